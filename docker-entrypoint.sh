@@ -0,0 +1,7 @@
+#!/bin/sh
+set -e
+# A named volume is seeded from the image only when it is created, so
+# the static files of this build are copied over it on every start.
+# Hashed files of earlier builds stay for pages that still link to them.
+cp -R /app/static-build/. /app/static/
+exec "$@"
@@ -0,0 +1,30 @@
+"""gunicorn settings of the Docker image (also read by bench_servers).
+
+Each worker warms up in ``post_worker_init`` unless ``WARMUP`` is set
+empty: it has loaded the app by then (see ``posts.warmup``) and does not
+accept connections until the hook returns. ``post_fork`` would run before
+the app is imported unless ``preload_app`` is on, which the gevent worker
+does not tolerate.
+"""
+import os
+
+os.environ.setdefault("WARMUP", "1")
+
+bind = "0:8000"
+timeout = 60
+worker_class = "gthread"
+threads = 8
+
+
+def post_worker_init(worker):
+    from django.conf import settings
+
+    from posts import warmup
+
+    if not settings.WARMUP:
+        return
+
+    timings = warmup.warm_up()
+    worker.log.info("Worker %s warmed up: %s", worker.pid, ", ".join(
+        f"{step} {seconds * 1000:.0f} ms" for step, seconds in timings.items()
+    ))
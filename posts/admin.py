@@ -1,9 +1,22 @@
 from django.contrib import admin
 
+from posts import search
 from posts.models import Comment, Follow, Group, Post
 
 
-class PostAdmin(admin.ModelAdmin):
+class FullTextSearchMixin:
+    search_comments = False
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term or not search.available():
+            return super().get_search_results(request, queryset,
+                                              search_term)
+        ids = search.matching_ids(search_term,
+                                  comments=self.search_comments)
+        return queryset.filter(pk__in=ids), False
+
+
+class PostAdmin(FullTextSearchMixin, admin.ModelAdmin):
     list_display = ("pk", "text", "pub_date", "author", "group")
     search_fields = ("text",)
     list_filter = ("pub_date",)
@@ -17,9 +30,10 @@ class GroupAdmin(admin.ModelAdmin):
     empty_value_display = "-пусто-"
 
 
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(FullTextSearchMixin, admin.ModelAdmin):
     list_display = ("pk", "author", "text", "created", "post")
     search_fields = ("text",)
+    search_comments = True
     list_filter = ("created",)
     empty_value_display = "-пусто-"
 
@@ -0,0 +1,93 @@
+"""Async versions of the read-heavy views for the ASGI entry point.
+
+Each one runs the whole sync view (ORM queries, cache lookups and
+template rendering) in a single thread pool of ``ASYNC_VIEW_THREADS``
+threads, so the event loop never blocks on SQLite and no more than that
+many requests touch the database at once. Every pool thread keeps its
+own connection, which is checked for ``CONN_MAX_AGE`` and errors around
+each view just as Django does for a sync request.
+"""
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial, wraps
+
+from django.conf import settings
+from django.db import close_old_connections, connections
+
+from posts import metrics, views
+
+_executor = None
+
+
+def executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.ASYNC_VIEW_THREADS,
+            thread_name_prefix="views"
+        )
+    return _executor
+
+
+def _run(view, request, *args, **kwargs):
+    close_old_connections()
+    try:
+        with metrics.track_queries():
+            return view(request, *args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+def in_thread_pool(view):
+    @wraps(view)
+    async def async_view(request, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        # The copied context carries the request metrics to the thread.
+        return await loop.run_in_executor(
+            executor(), contextvars.copy_context().run,
+            partial(_run, view, request, *args, **kwargs)
+        )
+    return async_view
+
+
+_DONE = object()
+
+
+def _stream_in_thread(content):
+    # Django iterates streaming responses on the event loop, where the
+    # ORM refuses to run. Each chunk is produced in a thread of its own,
+    # which keeps the database cursor of the stream on one connection.
+    worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="stream")
+    iterator = iter(content)
+    try:
+        while True:
+            chunk = worker.submit(next, iterator, _DONE).result()
+            if chunk is _DONE:
+                return
+            yield chunk
+    finally:
+        worker.submit(connections.close_all).result()
+        worker.shutdown()
+
+
+def streaming_in_thread_pool(view):
+    async_view = in_thread_pool(view)
+
+    @wraps(view)
+    async def streaming_view(request, *args, **kwargs):
+        response = await async_view(request, *args, **kwargs)
+        if response.streaming:
+            response.streaming_content = _stream_in_thread(
+                response.streaming_content
+            )
+        return response
+    return streaming_view
+
+
+index = in_thread_pool(views.index)
+group_posts = in_thread_pool(views.group_posts)
+profile = in_thread_pool(views.profile)
+post_view = in_thread_pool(views.post_view)
+follow_index = in_thread_pool(views.follow_index)
+profile_export = streaming_in_thread_pool(views.profile_export)
@@ -0,0 +1,144 @@
+import asyncio
+import itertools
+import json
+import os
+import statistics
+import subprocess
+import time
+from collections import Counter
+
+
+def percentile(samples, fraction):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(samples):
+    """Latency summary in milliseconds for samples given in seconds."""
+    return {
+        "count": len(samples),
+        "mean_ms": round(statistics.fmean(samples) * 1000, 4)
+        if samples else 0.0,
+        "p50_ms": round(percentile(samples, 0.50) * 1000, 4),
+        "p95_ms": round(percentile(samples, 0.95) * 1000, 4),
+        "p99_ms": round(percentile(samples, 0.99) * 1000, 4),
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+            text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def write_report(path, report):
+    report = {"revision": git_revision(), **report}
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w") as output:
+        json.dump(report, output, indent=2, ensure_ascii=False)
+    return report
+
+
+def view_targets():
+    """Yield ``(name, url, user)`` for the main views over current data.
+
+    The busiest author, reader and most commented post are picked so the
+    slowest realistic page of each view is measured.
+    """
+    from django.urls import reverse
+
+    from posts.models import Group, Post, UserStats
+    from posts.paginator import KeysetPaginator
+
+    author = (UserStats.objects.order_by("-posts_count")
+              .select_related("user").first())
+    reader = (UserStats.objects.order_by("-following_count")
+              .select_related("user").first())
+    post = Post.objects.order_by("-comments_count", "-pk").first()
+    group = Group.objects.first()
+    if not (author and reader and post):
+        return
+    username = author.user.username
+    yield "index", reverse("index"), None
+    yield "index_deep", reverse("index") + "?page=200", None
+    yield "groups_index", reverse("groups_index"), None
+    if group:
+        yield "group_posts", reverse("group_posts", args=[group.slug]), None
+    yield "profile", reverse("profile", args=[username]), None
+    cursor = (KeysetPaginator(author.user.posts.all(), 5).page_after()
+              .next_cursor())
+    if cursor:
+        yield ("profile_next",
+               reverse("profile", args=[username]) + f"?after={cursor}", None)
+    post_args = [post.author.username, post.pk]
+    yield "post", reverse("post", args=post_args), None
+    yield "post_comments", reverse("post_comments", args=post_args), None
+    yield "follow_index", reverse("follow_index"), reader.user
+    yield "search", reverse("search") + "?q=кот", None
+
+
+async def _read_response(reader):
+    head = await reader.readuntil(b"\r\n\r\n")
+    status = int(head.split(b" ", 2)[1])
+    headers = {}
+    for line in head.split(b"\r\n")[1:]:
+        name, _, value = line.partition(b":")
+        headers[name.strip().lower().decode()] = value.strip().decode()
+    await reader.readexactly(int(headers.get("content-length", 0)))
+    return status, headers
+
+
+async def _client(address, paths, deadline, result, count_header):
+    reader = writer = None
+    host, port = address
+    while time.perf_counter() < deadline:
+        path = next(paths)
+        started = time.perf_counter()
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection(host, port)
+            writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\n"
+                         "Connection: keep-alive\r\n\r\n".encode())
+            status, headers = await _read_response(reader)
+        except (OSError, asyncio.IncompleteReadError, ValueError):
+            result["errors"] += 1
+            writer = None
+            continue
+        if status != 200:
+            result["errors"] += 1
+            continue
+        result["latencies"].append(time.perf_counter() - started)
+        if count_header:
+            result["headers"][headers.get(count_header, "-")] += 1
+    if writer is not None:
+        writer.close()
+
+
+def http_load(host, port, paths, concurrency, seconds, count_header=None):
+    """Send GET ``paths`` round-robin over ``concurrency`` keep-alive
+    connections for ``seconds``.
+
+    Returns successful request latencies, the error count and how often
+    each value of ``count_header`` was seen.
+    """
+    result = {"latencies": [], "errors": 0, "headers": Counter()}
+
+    async def run():
+        cycle = itertools.cycle(paths)
+        deadline = time.perf_counter() + seconds
+        await asyncio.gather(*[
+            _client((host, port), cycle, deadline, result, count_header)
+            for _ in range(concurrency)
+        ])
+
+    asyncio.run(run())
+    return result["latencies"], result["errors"], result["headers"]
@@ -0,0 +1,122 @@
+"""Denormalized counters: posts and follows of users and groups, comments
+of posts.
+
+Counters are bumped with a single ``UPDATE ... SET n = n + 1`` from the
+signal handlers. A missing stats row means every counter is zero: the row
+is created by recounting the first time something is added, and removals
+never create rows. ``manage.py recount`` repairs any drift.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from posts.models import (Comment, Follow, Group, GroupStats, Post, User,
+                          UserStats)
+
+
+def recount_user(user_id):
+    UserStats.objects.update_or_create(user_id=user_id, defaults={
+        "posts_count": Post.objects.filter(author_id=user_id).count(),
+        "followers_count": Follow.objects.filter(author_id=user_id).count(),
+        "following_count": Follow.objects.filter(user_id=user_id).count(),
+    })
+
+
+def recount_group(group_id):
+    GroupStats.objects.update_or_create(group_id=group_id, defaults={
+        "posts_count": Post.objects.filter(group_id=group_id).count(),
+    })
+
+
+def _add(model, pk, recount, **deltas):
+    changes = {field: F(field) + delta for field, delta in deltas.items()}
+    if model.objects.filter(pk=pk).update(**changes):
+        return
+    if any(delta > 0 for delta in deltas.values()):
+        try:
+            with transaction.atomic():
+                recount(pk)
+        except IntegrityError:
+            # Another request created the row between our UPDATE and
+            # INSERT, and its recount already includes this change.
+            pass
+
+
+def add_to_user(user_id, **deltas):
+    _add(UserStats, user_id, recount_user, **deltas)
+
+
+def add_to_group(group_id, **deltas):
+    _add(GroupStats, group_id, recount_group, **deltas)
+
+
+def add_to_post(post_id, **deltas):
+    Post.objects.filter(pk=post_id).update(
+        **{field: F(field) + delta for field, delta in deltas.items()}
+    )
+
+
+def recount_comments():
+    """Fix ``Post.comments_count`` in one UPDATE, return the fixed rows."""
+    actual = Coalesce(Subquery(
+        Comment.objects.filter(post=OuterRef("pk")).order_by()
+        .values("post").annotate(n=Count("id")).values("n")
+    ), 0)
+    drifted = (Post.objects.annotate(actual=actual)
+               .exclude(comments_count=F("actual")).values("pk"))
+    return Post.objects.filter(pk__in=drifted).update(comments_count=actual)
+
+
+def user_stats(user):
+    try:
+        return user.stats
+    except UserStats.DoesNotExist:
+        return UserStats(user=user)
+
+
+def recount_all():
+    """Recompute every counter in a handful of GROUP BY queries.
+
+    Returns the number of stats rows that were missing or had drifted.
+    """
+    posts = dict(Post.objects.order_by().values_list("author")
+                 .annotate(n=Count("id")))
+    followers = dict(Follow.objects.order_by().values_list("author")
+                     .annotate(n=Count("id")))
+    following = dict(Follow.objects.order_by().values_list("user")
+                     .annotate(n=Count("id")))
+    group_posts = dict(Post.objects.order_by().exclude(group=None)
+                       .values_list("group").annotate(n=Count("id")))
+    fixed = _sync(
+        UserStats, "user_id", User.objects.values_list("pk", flat=True),
+        lambda pk: {"posts_count": posts.get(pk, 0),
+                    "followers_count": followers.get(pk, 0),
+                    "following_count": following.get(pk, 0)}
+    )
+    fixed += _sync(
+        GroupStats, "group_id", Group.objects.values_list("pk", flat=True),
+        lambda pk: {"posts_count": group_posts.get(pk, 0)}
+    )
+    fixed += recount_comments()
+    return fixed
+
+
+def _sync(model, key, pks, expected, batch_size=500):
+    current = {row.pk: row for row in model.objects.iterator()}
+    missing, drifted = [], []
+    fields = None
+    for pk in pks.iterator():
+        values = expected(pk)
+        fields = list(values)
+        row = current.get(pk)
+        if row is None:
+            missing.append(model(**{key: pk}, **values))
+        elif any(getattr(row, field) != value
+                 for field, value in values.items()):
+            for field, value in values.items():
+                setattr(row, field, value)
+            drifted.append(row)
+    model.objects.bulk_create(missing, batch_size=batch_size)
+    if drifted:
+        model.objects.bulk_update(drifted, fields, batch_size=batch_size)
+    return len(missing) + len(drifted)
@@ -0,0 +1,94 @@
+"""Anonymous page caching in nginx in front of Django.
+
+Pages rendered for anonymous visitors hold nothing viewer-specific, so
+nginx may share them (see ``nginx/default.conf``); requests carrying a
+session cookie bypass it. ``edge_cacheable`` marks anonymous responses
+with ``X-Accel-Expires`` for nginx and a ``Surrogate-Key`` listing the
+page's scopes for CDNs that purge by key, while browsers keep
+revalidating with the ETag. ``purge`` runs after a write commits and
+re-requests the first page of every changed scope through the internal
+refresh listener ``EDGE_CACHE_URL``, so nginx replaces its copy.
+"""
+import logging
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils.cache import patch_cache_control
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+
+def edge_cacheable(scopes):
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            response = view(request, *args, **kwargs)
+            if (request.method not in ("GET", "HEAD")
+                    or response.status_code not in (200, 304)):
+                return response
+            if request.user.is_authenticated:
+                patch_cache_control(response, private=True, max_age=0)
+                return response
+            patch_cache_control(response, public=True, max_age=0,
+                                must_revalidate=True)
+            page_scopes = scopes(request, *args, **kwargs)
+            response["Surrogate-Key"] = " ".join(page_scopes)
+            # A stale copy served during a rebuild must not be shared.
+            stale = response.get("X-Page-Cache") == "stale"
+            response["X-Accel-Expires"] = (
+                "0" if stale else str(settings.EDGE_CACHE_TIMEOUT)
+            )
+            return response
+        return wrapper
+    return decorator
+
+
+def scope_urls(scopes):
+    from django.urls import reverse
+
+    from posts.models import Post
+
+    urls = []
+    for scope in scopes:
+        kind, _, name = scope.partition(":")
+        if kind == "posts":
+            urls.append(reverse("index"))
+        elif kind == "group":
+            urls.append(reverse("group_posts", args=[name]))
+        elif kind == "user":
+            urls.append(reverse("profile", args=[name]))
+        elif kind == "post":
+            username = (Post.objects.filter(pk=name)
+                        .values_list("author__username", flat=True).first())
+            if username:
+                urls.append(reverse("post", args=[username, name]))
+    return urls
+
+
+def _refresh(scopes):
+    try:
+        for url in scope_urls(scopes):
+            request = urllib.request.Request(settings.EDGE_CACHE_URL + url)
+            try:
+                with urllib.request.urlopen(request, timeout=5) as response:
+                    response.read()
+            except OSError as error:
+                logger.warning("Could not refresh %s: %s", url, error)
+    finally:
+        close_old_connections()
+
+
+def purge(scopes):
+    if not settings.EDGE_CACHE_URL:
+        return
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=1,
+                                       thread_name_prefix="edge-purge")
+    # page_cache.bump calls this once the write has committed.
+    _executor.submit(_refresh, list(scopes))
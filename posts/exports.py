@@ -0,0 +1,137 @@
+"""Archives of an author's posts and comments, built while they download.
+
+``FORMATS`` maps a format name to a generator of response chunks and its
+content type: ``jsonl`` (one JSON object per line), ``csv`` and ``zip``
+(``posts.jsonl``, ``comments.jsonl`` and the post images). Rows are read
+with ``iterator(chunk_size=CHUNK_SIZE)`` and written out as soon as about
+``BUFFER_SIZE`` bytes are ready, so the first bytes leave right away and
+memory does not depend on how much the author wrote.
+"""
+import csv
+import json
+import zipfile
+from itertools import chain
+
+from posts.models import Comment, Post
+
+CHUNK_SIZE = 2000
+BUFFER_SIZE = 1 << 16
+CSV_COLUMNS = ("type", "id", "post", "group", "date", "text", "image")
+
+
+def post_rows(author):
+    posts = (Post.objects.filter(author=author).order_by("pk")
+             .values_list("pk", "pub_date", "group__slug", "text", "image"))
+    for pk, pub_date, group, text, image in posts.iterator(CHUNK_SIZE):
+        yield {"type": "post", "id": pk, "date": pub_date.isoformat(),
+               "group": group or "", "text": text, "image": image or ""}
+
+
+def comment_rows(author):
+    comments = (Comment.objects.filter(author=author).order_by("pk")
+                .values_list("pk", "post_id", "created", "text"))
+    for pk, post_id, created, text in comments.iterator(CHUNK_SIZE):
+        yield {"type": "comment", "id": pk, "post": post_id,
+               "date": created.isoformat(), "text": text}
+
+
+def _json_lines(rows):
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False) + "\n"
+
+
+def _buffered(lines):
+    """Join short strings into chunks of about ``BUFFER_SIZE`` bytes."""
+    buffer, size = [], 0
+    for line in lines:
+        data = line.encode()
+        buffer.append(data)
+        size += len(data)
+        if size >= BUFFER_SIZE:
+            yield b"".join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield b"".join(buffer)
+
+
+def jsonl_archive(author):
+    return _buffered(_json_lines(chain(post_rows(author),
+                                       comment_rows(author))))
+
+
+class _Line:
+    """File-like object for csv.writer that hands back the written line."""
+
+    def write(self, value):
+        return value
+
+
+def csv_archive(author):
+    writer = csv.writer(_Line())
+    rows = chain(post_rows(author), comment_rows(author))
+    return _buffered(chain(
+        [writer.writerow(CSV_COLUMNS)],
+        (writer.writerow([row.get(column, "") for column in CSV_COLUMNS])
+         for row in rows)
+    ))
+
+
+class _Output:
+    """Write-only stream collecting what zipfile writes between yields.
+
+    Without ``tell`` zipfile writes entries with data descriptors and
+    never seeks back.
+    """
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        chunks, self.chunks = self.chunks, []
+        return [b"".join(chunks)] if chunks else []
+
+
+def _image_names(author):
+    return (Post.objects.filter(author=author).exclude(image="")
+            .exclude(image=None).order_by("image")
+            .values_list("image", flat=True).distinct()
+            .iterator(CHUNK_SIZE))
+
+
+def zip_archive(author):
+    output = _Output()
+    storage = Post._meta.get_field("image").storage
+    with zipfile.ZipFile(output, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, rows in (("posts.jsonl", post_rows(author)),
+                           ("comments.jsonl", comment_rows(author))):
+            with archive.open(name, "w", force_zip64=True) as entry:
+                for chunk in _buffered(_json_lines(rows)):
+                    entry.write(chunk)
+                    yield from output.drain()
+        for name in _image_names(author):
+            # Images are compressed already, so they are only stored.
+            info = zipfile.ZipInfo(f"images/{name}")
+            info.compress_type = zipfile.ZIP_STORED
+            try:
+                source = storage.open(name)
+            except OSError:
+                continue
+            with source, archive.open(info, "w", force_zip64=True) as entry:
+                for chunk in source.chunks(BUFFER_SIZE):
+                    entry.write(chunk)
+                    yield from output.drain()
+    yield from output.drain()
+
+
+FORMATS = {
+    "jsonl": (jsonl_archive, "application/x-ndjson; charset=utf-8"),
+    "csv": (csv_archive, "text/csv; charset=utf-8"),
+    "zip": (zip_archive, "application/zip"),
+}
@@ -0,0 +1,23 @@
+"""Follow checks that never load an author's follower list.
+
+``is_following`` is a single EXISTS served by the ``following_unique``
+index on ``(user, author)``. ``followed_among`` answers the same question
+for a batch of authors with one ``IN`` query, for feeds. Neither depends
+on how many followers an author has.
+"""
+from posts.models import Follow
+
+
+def is_following(user, author):
+    if not user.is_authenticated or user.pk == author.pk:
+        return False
+    return Follow.objects.filter(user=user, author=author).exists()
+
+
+def followed_among(user, author_ids):
+    """Return the ids in ``author_ids`` of authors ``user`` follows."""
+    author_ids = list(author_ids)
+    if not user.is_authenticated or not author_ids:
+        return set()
+    return set(Follow.objects.filter(user=user, author_id__in=author_ids)
+               .values_list("author_id", flat=True))
@@ -0,0 +1,35 @@
+"""Per-post cache of the parts of post cards that are the same for everyone.
+
+The fragment of each post on a page is fetched with one ``get_many``;
+only the missing ones are rendered and stored back with one ``set_many``.
+Keys include ``Post.updated``, so an edited post gets a new fragment.
+Buttons that depend on the viewer stay in the including template.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from posts import metrics
+
+
+def _fragment_key(template_name, post):
+    return f"fragment:{template_name}:{post.pk}:{post.updated.timestamp()}"
+
+
+def attach_fragments(posts, template_name):
+    posts = list(posts)
+    keys = {post.pk: _fragment_key(template_name, post) for post in posts}
+    found = cache.get_many(list(keys.values()))
+    metrics.cache_lookup(len(found), len(keys) - len(found))
+    rendered = {}
+    for post in posts:
+        key = keys[post.pk]
+        html = found.get(key)
+        if html is None:
+            html = render_to_string(template_name, {"post": post})
+            rendered[key] = html
+        post.fragment = mark_safe(html)
+    if rendered:
+        cache.set_many(rendered, settings.FRAGMENT_CACHE_TIMEOUT)
+    return posts
@@ -0,0 +1,169 @@
+"""Thumbnails of post images, built outside the request cycle.
+
+Saving a post with a new image clears ``Post.thumbnail`` and
+``Post.image_variants`` and queues a ``ThumbnailJob``. A job builds the
+JPEG thumbnail plus WebP (and AVIF, when Pillow can write it) variants in
+several widths for ``srcset``. Variants are named after a hash of their
+content so they can be cached forever, and the previous set is deleted
+once the post points at the new one. ``manage.py process_thumbnails``
+works the queue and ``manage.py pregenerate_thumbnails`` fills in
+existing posts on every core. Templates only read the stored names and
+fall back to the original image while they are empty, so a page view
+never resizes.
+"""
+import hashlib
+import io
+import os
+from datetime import timedelta
+
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from posts import metrics
+from posts.models import Post, ThumbnailJob
+
+THUMBNAIL_GEOMETRY = "960x339"
+THUMBNAIL_OPTIONS = {"crop": "center", "upscale": True}
+LOCK_TIME = timedelta(minutes=5)
+MAX_ATTEMPTS = 5
+
+VARIANT_WIDTHS = (480, 960, 1440)
+VARIANT_ASPECT = 960 / 339
+VARIANT_FORMATS = (
+    ("avif", "AVIF", {"quality": 55, "speed": 6}),
+    ("webp", "WEBP", {"quality": 75, "method": 4}),
+)
+VARIANT_DIRECTORY = "variants"
+
+
+def enqueue(post):
+    ThumbnailJob.objects.update_or_create(
+        post=post, defaults={"attempts": 0, "locked_until": None,
+                             "last_error": ""}
+    )
+
+
+def build_thumbnail(post):
+    from sorl.thumbnail import get_thumbnail
+
+    return get_thumbnail(post.image, THUMBNAIL_GEOMETRY,
+                         **THUMBNAIL_OPTIONS).name
+
+
+def variant_formats():
+    from PIL import Image
+
+    Image.init()
+    return [(name, pil_format, options)
+            for name, pil_format, options in VARIANT_FORMATS
+            if pil_format in Image.SAVE]
+
+
+def build_variants(post):
+    """Save width variants of the post image and return their metadata."""
+    from PIL import Image, ImageOps
+
+    storage = post.image.storage
+    with storage.open(post.image.name) as file:
+        source = ImageOps.exif_transpose(Image.open(file))
+        source = source.convert("RGB")
+    widths = [width for width in VARIANT_WIDTHS
+              if width <= source.width] or [source.width]
+    variants = []
+    for name, pil_format, options in variant_formats():
+        for width in widths:
+            image = ImageOps.fit(
+                source, (width, round(width / VARIANT_ASPECT)),
+                method=Image.LANCZOS
+            )
+            buffer = io.BytesIO()
+            image.save(buffer, pil_format, **options)
+            data = buffer.getvalue()
+            # Names carry a hash of the content, so a rebuilt variant gets
+            # a new URL and nginx may cache every file forever.
+            digest = hashlib.md5(data).hexdigest()[:12]
+            path = variant_path(post.pk, f"{width}-{digest}.{name}")
+            if not storage.exists(path):
+                path = storage.save(path, ContentFile(data))
+            variants.append({"format": name, "width": width, "name": path})
+    return variants
+
+
+def variant_path(post_id, name=""):
+    return os.path.join(VARIANT_DIRECTORY, str(post_id), name)
+
+
+def delete_stale_variants(post, keep):
+    """Delete the variant files of the post that are not in ``keep``."""
+    storage = post.image.storage
+    directory = variant_path(post.pk)
+    try:
+        _, files = storage.listdir(directory)
+    except FileNotFoundError:
+        return
+    keep = {variant["name"] for variant in keep}
+    for name in files:
+        path = variant_path(post.pk, name)
+        if path not in keep:
+            storage.delete(path)
+
+
+def process_post(post_id):
+    """Build the thumbnail and variants of a post, False to retry later."""
+    post = Post.objects.filter(pk=post_id).first()
+    if post is None or not post.image:
+        return True
+    image_name = post.image.name
+    with metrics.timed("thumbnail"):
+        thumbnail = build_thumbnail(post)
+        variants = build_variants(post)
+    with transaction.atomic():
+        post = Post.objects.select_for_update().filter(pk=post_id).first()
+        if post is None:
+            return True
+        # The image may have been replaced while we were resizing.
+        if post.image.name != image_name:
+            return False
+        post.thumbnail = thumbnail
+        post.image_variants = variants
+        post.save(update_fields=["thumbnail", "image_variants", "updated"])
+    # Variants of a replaced image or an earlier build are not linked any
+    # more once the post points at the new set.
+    delete_stale_variants(post, variants)
+    return True
+
+
+def claim_jobs(limit):
+    now = timezone.now()
+    candidates = (ThumbnailJob.objects
+                  .filter(Q(locked_until=None) | Q(locked_until__lt=now),
+                          attempts__lt=MAX_ATTEMPTS)
+                  .values_list("pk", "post_id")[:limit])
+    claimed = []
+    for pk, post_id in candidates:
+        # The conditional UPDATE makes sure only one runner gets the job.
+        if ThumbnailJob.objects.filter(
+                Q(locked_until=None) | Q(locked_until__lt=now), pk=pk
+        ).update(locked_until=now + LOCK_TIME):
+            claimed.append((pk, post_id))
+    return claimed
+
+
+def run_job(pk, post_id):
+    try:
+        done = process_post(post_id)
+    except Exception as error:
+        job = ThumbnailJob.objects.filter(pk=pk)
+        attempts = (job.values_list("attempts", flat=True).first() or 0) + 1
+        # Back off exponentially before the next attempt.
+        job.update(attempts=attempts, last_error=repr(error),
+                   locked_until=timezone.now()
+                   + timedelta(seconds=30 * 2 ** attempts))
+        return False
+    if not done:
+        ThumbnailJob.objects.filter(pk=pk).update(locked_until=None)
+        return False
+    ThumbnailJob.objects.filter(pk=pk).delete()
+    return True
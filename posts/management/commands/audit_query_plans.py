@@ -0,0 +1,147 @@
+import hashlib
+import json
+import os
+import re
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import setup_test_environment
+
+from posts.benchmarks import view_targets
+from posts.management.commands.generate_data import confirm_flush
+
+BASELINE = os.path.join(settings.BASE_DIR, "posts", "query_plans.json")
+
+
+class SelectCollector:
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        if not many and sql.lstrip().upper().startswith("SELECT"):
+            self.queries.append((sql, params))
+        return execute(sql, params, many, context)
+
+
+def signature(sql):
+    # IN lists and inlined LIMIT/OFFSET values change with the data, the
+    # query shape does not.
+    shape = re.sub(r"\(%s(, %s)*\)", "(%s...)", sql)
+    shape = re.sub(r"\b(LIMIT|OFFSET) \d+", r"\1 N", shape)
+    return hashlib.md5(shape.encode()).hexdigest()[:12]
+
+
+def explain(sql, params):
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def problems(plan):
+    """Full table scans and temporary sorts in a query plan."""
+    found = []
+    for detail in plan:
+        if "TEMP B-TREE" in detail:
+            found.append(detail)
+        elif (detail.startswith("SCAN ") and " USING " not in detail
+              and "VIRTUAL TABLE" not in detail
+              and "CONSTANT ROW" not in detail):
+            found.append(detail)
+    return found
+
+
+class Command(BaseCommand):
+    help = ("Run the queries of every main view through EXPLAIN QUERY PLAN, "
+            "report full scans and temporary sorts and fail on ones not in "
+            "the baseline.")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--posts", type=int,
+            help="Regenerate the dataset with this many posts first "
+                 "(deletes existing data)."
+        )
+        parser.add_argument("--noinput", "--no-input", action="store_false",
+                            dest="interactive",
+                            help="Do not ask before --posts deletes data.")
+        parser.add_argument("--baseline", default=BASELINE,
+                            help="Accepted findings, as JSON.")
+        parser.add_argument("--write-baseline", action="store_true",
+                            help="Accept the current findings.")
+
+    def handle(self, *args, **options):
+        if connection.vendor != "sqlite":
+            raise CommandError("Query plans are only audited on SQLite.")
+        try:
+            setup_test_environment()
+        except RuntimeError:
+            # Already set up when the audit runs inside the test suite.
+            pass
+        if options["posts"]:
+            confirm_flush(options["interactive"])
+            call_command(
+                "generate_data", flush=True, interactive=False,
+                posts=options["posts"],
+                users=max(100, options["posts"] // 50),
+                comments=options["posts"] * 2, stdout=self.stdout
+            )
+        targets = list(view_targets())
+        if not targets:
+            raise CommandError("Nothing to audit, run generate_data first.")
+        findings = {}
+        for name, url, user in targets:
+            findings.update(self.audit(name, url, user))
+        if options["write_baseline"]:
+            with open(options["baseline"], "w") as output:
+                json.dump(findings, output, indent=2, ensure_ascii=False,
+                          sort_keys=True)
+            self.stdout.write(f"Wrote {len(findings)} findings to "
+                              f"{options['baseline']}.")
+            return
+        accepted = {}
+        if os.path.exists(options["baseline"]):
+            with open(options["baseline"]) as baseline:
+                accepted = json.load(baseline)
+        regressions = [
+            key for key, finding in findings.items()
+            if not set(finding["problems"])
+            <= set(accepted.get(key, {}).get("problems", []))
+        ]
+        for key in regressions:
+            self.stderr.write(f"Regressed: {key} {findings[key]['sql']}")
+        if regressions:
+            raise CommandError(f"{len(regressions)} query plans regressed.")
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(findings)} known findings, no regressions."
+        ))
+
+    def audit(self, name, url, user):
+        client = Client()
+        if user is not None:
+            client.force_login(user)
+        cache.clear()
+        collector = SelectCollector()
+        with connection.execute_wrapper(collector):
+            response = client.get(url)
+        if response.status_code != 200:
+            raise CommandError(f"{url} returned {response.status_code}")
+        findings = {}
+        for sql, params in collector.queries:
+            found = problems(explain(sql, params))
+            if found:
+                findings[f"{name}:{signature(sql)}"] = {
+                    "sql": sql, "problems": found
+                }
+        self.stdout.write(
+            f"{name:<14} {len(collector.queries):>3} queries, "
+            f"{len(findings)} with full scans or temporary sorts"
+        )
+        for finding in findings.values():
+            for problem in finding["problems"]:
+                self.stdout.write(f"    {problem}")
+            self.stdout.write(f"      {finding['sql'][:200]}")
+        return findings
@@ -0,0 +1,86 @@
+import multiprocessing
+import random
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+
+from posts.benchmarks import summarize, write_report
+
+
+def _worker(options, seed, results):
+    rng = random.Random(seed)
+    value = b"x" * options["value_size"]
+    # Page popularity is heavily skewed, so keys follow a Zipf-like curve.
+    weights = [1 / (rank + 1) for rank in range(options["keys"])]
+    keys = rng.choices(range(options["keys"]), weights=weights,
+                       k=options["ops"])
+    gets, sets, hits = [], [], 0
+    for number in keys:
+        key = f"bench:{number}"
+        started = time.perf_counter()
+        found = cache.get(key)
+        gets.append(time.perf_counter() - started)
+        if found is None:
+            started = time.perf_counter()
+            cache.set(key, value, options["timeout"])
+            sets.append(time.perf_counter() - started)
+        else:
+            hits += 1
+    results.put((gets, sets, hits))
+
+
+class Command(BaseCommand):
+    help = ("Measure get/set latency and hit rate of the default cache "
+            "with several worker processes sharing a key space.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, nargs="+",
+                            default=[1, 2, 4, 8])
+        parser.add_argument("--ops", type=int, default=5000,
+                            help="Operations per worker.")
+        parser.add_argument("--keys", type=int, default=1000)
+        parser.add_argument("--value-size", type=int, default=20000)
+        parser.add_argument("--timeout", type=int, default=300)
+        parser.add_argument("--output", help="Write a JSON report here.")
+
+    def handle(self, *args, **options):
+        backend = f"{cache.__module__}.{type(cache).__name__}"
+        runs = []
+        for workers in options["workers"]:
+            cache.clear()
+            results = multiprocessing.Queue()
+            processes = [
+                multiprocessing.Process(target=_worker,
+                                        args=(options, seed, results))
+                for seed in range(workers)
+            ]
+            started = time.perf_counter()
+            for process in processes:
+                process.start()
+            collected = [results.get() for _ in processes]
+            for process in processes:
+                process.join()
+            elapsed = time.perf_counter() - started
+            gets = [sample for result in collected for sample in result[0]]
+            sets = [sample for result in collected for sample in result[1]]
+            hits = sum(result[2] for result in collected)
+            run = {
+                "workers": workers,
+                "ops_per_second": round(len(gets) / elapsed),
+                "hit_rate": round(hits / len(gets), 4),
+                "get": summarize(gets),
+                "set": summarize(sets),
+            }
+            runs.append(run)
+            self.stdout.write(
+                f"{workers:>3} workers: hit rate {run['hit_rate']:.1%}, "
+                f"get p50 {run['get']['p50_ms']} ms "
+                f"p95 {run['get']['p95_ms']} ms, "
+                f"set p50 {run['set']['p50_ms']} ms "
+                f"p95 {run['set']['p95_ms']} ms, "
+                f"{run['ops_per_second']} ops/s"
+            )
+        if options["output"]:
+            write_report(options["output"], {"backend": backend,
+                                             "runs": runs})
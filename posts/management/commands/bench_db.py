@@ -0,0 +1,115 @@
+import multiprocessing
+import random
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connections
+
+from posts.benchmarks import summarize, write_report
+from posts.models import Comment, Post
+
+User = get_user_model()
+
+TEXT = "bench_db"
+
+
+def _read(rng, post_ids):
+    list(Post.objects.select_related("author", "group")[:10])
+    post = Post.objects.select_related("author").get(pk=rng.choice(post_ids))
+    list(post.comments.select_related("author")[:20])
+
+
+def _write(rng, post_ids, user_ids):
+    Comment.objects.create(post_id=rng.choice(post_ids),
+                           author_id=rng.choice(user_ids), text=TEXT)
+
+
+def _worker(options, seed, post_ids, user_ids, results):
+    rng = random.Random(seed)
+    reads, writes, errors = [], [], 0
+    deadline = time.perf_counter() + options["seconds"]
+    while time.perf_counter() < deadline:
+        is_write = rng.random() < options["write_ratio"]
+        started = time.perf_counter()
+        try:
+            if is_write:
+                _write(rng, post_ids, user_ids)
+            else:
+                _read(rng, post_ids)
+        except OperationalError:
+            # "database is locked": the request would have failed.
+            errors += 1
+            continue
+        (writes if is_write else reads).append(
+            time.perf_counter() - started
+        )
+    connections.close_all()
+    results.put((reads, writes, errors))
+
+
+class Command(BaseCommand):
+    help = ("Measure throughput and latency of the configured database "
+            "with several processes running a mix of page reads and "
+            "comment writes.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, nargs="+",
+                            default=[1, 4, 8])
+        parser.add_argument("--seconds", type=float, default=10)
+        parser.add_argument("--write-ratio", type=float, default=0.1)
+        parser.add_argument("--output", help="Write a JSON report here.")
+
+    def handle(self, *args, **options):
+        post_ids = list(Post.objects.values_list("pk", flat=True)[:10000])
+        user_ids = list(User.objects.values_list("pk", flat=True)[:10000])
+        if not post_ids:
+            raise CommandError("Nothing to measure, run generate_data first.")
+        database = settings.DATABASES["default"]
+        runs = []
+        for workers in options["workers"]:
+            # Forked workers must open their own connections.
+            connections.close_all()
+            context = multiprocessing.get_context("fork")
+            results = context.Queue()
+            processes = [
+                context.Process(target=_worker, args=(
+                    options, seed, post_ids, user_ids, results
+                ))
+                for seed in range(workers)
+            ]
+            for process in processes:
+                process.start()
+            reads, writes, errors = [], [], 0
+            for _ in processes:
+                worker_reads, worker_writes, worker_errors = results.get()
+                reads += worker_reads
+                writes += worker_writes
+                errors += worker_errors
+            for process in processes:
+                process.join()
+            run = {
+                "workers": workers,
+                "ops_per_second": round((len(reads) + len(writes))
+                                        / options["seconds"], 1),
+                "reads": summarize(reads),
+                "writes": summarize(writes),
+                "locked_errors": errors,
+            }
+            runs.append(run)
+            self.stdout.write(
+                f"{workers:>3} workers  {run['ops_per_second']:>9} ops/s  "
+                f"read p95 {run['reads']['p95_ms']:>8} ms  "
+                f"write p95 {run['writes']['p95_ms']:>8} ms  "
+                f"{errors} locked"
+            )
+        deleted, _ = Comment.objects.filter(text=TEXT).delete()
+        self.stdout.write(f"Removed {deleted} benchmark comments.")
+        if options["output"]:
+            write_report(options["output"], {
+                "engine": database["ENGINE"],
+                "conn_max_age": database.get("CONN_MAX_AGE", 0),
+                "write_ratio": options["write_ratio"],
+                "runs": runs,
+            })
@@ -0,0 +1,45 @@
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.benchmarks import http_load, summarize, view_targets, write_report
+
+
+class Command(BaseCommand):
+    help = ("Load anonymous pages through the nginx edge cache and report "
+            "throughput, latency and the X-Cache-Status hit ratio.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", default="http://127.0.0.1:80",
+                            help="Address of the nginx container.")
+        parser.add_argument("--concurrency", type=int, default=50)
+        parser.add_argument("--seconds", type=float, default=30)
+        parser.add_argument("--output", help="Write a JSON report here.")
+
+    def handle(self, *args, **options):
+        address = urlsplit(options["url"])
+        paths = [url for name, url, user in view_targets() if user is None]
+        if not paths:
+            raise CommandError("Nothing to measure, run generate_data first.")
+        latencies, errors, statuses = http_load(
+            address.hostname, address.port or 80, paths,
+            options["concurrency"], options["seconds"],
+            count_header="x-cache-status"
+        )
+        served = sum(statuses.values())
+        hits = statuses["HIT"] + statuses["REVALIDATED"]
+        report = {
+            "requests_per_second": round(len(latencies)
+                                         / options["seconds"], 1),
+            "errors": errors,
+            "hit_ratio": round(hits / served, 4) if served else 0.0,
+            "cache_status": dict(statuses),
+            **summarize(latencies),
+        }
+        self.stdout.write(
+            f"{report['requests_per_second']} req/s  "
+            f"p50 {report['p50_ms']} ms  p99 {report['p99_ms']} ms  "
+            f"hit ratio {report['hit_ratio']:.1%}  {dict(statuses)}"
+        )
+        if options["output"]:
+            write_report(options["output"], report)
@@ -0,0 +1,94 @@
+import os
+import socket
+import subprocess
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.benchmarks import (http_load, summarize, view_targets,
+                              write_report)
+
+SERVERS = {
+    "wsgi-gevent": ["yatube.wsgi:application", "--worker-class", "gevent"],
+    "wsgi-gthread": ["yatube.wsgi:application", "--worker-class",
+                     "gthread", "--threads", "8"],
+    "asgi-uvicorn": ["yatube.asgi:application", "--worker-class",
+                     "uvicorn.workers.UvicornWorker"],
+}
+
+
+def _wait_for_port(port, process, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise CommandError("The server exited during startup.")
+        try:
+            socket.create_connection(("127.0.0.1", port), 0.5).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise CommandError(f"Nothing listens on port {port}.")
+
+
+class Command(BaseCommand):
+    help = ("Start the app under each server (gunicorn with gevent or "
+            "gthread workers, uvicorn workers for ASGI) and report "
+            "throughput and tail latency of anonymous page views at several "
+            "concurrency levels.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--servers", nargs="+", choices=list(SERVERS),
+                            default=list(SERVERS))
+        parser.add_argument("--concurrency", type=int, nargs="+",
+                            default=[10, 50, 200])
+        parser.add_argument("--seconds", type=float, default=10)
+        parser.add_argument("--workers", type=int, default=2)
+        parser.add_argument("--port", type=int, default=8765)
+        parser.add_argument("--output", help="Write a JSON report here.")
+
+    def handle(self, *args, **options):
+        paths = [url for name, url, user in view_targets() if user is None
+                 and name in ("index", "group_posts", "profile", "post")]
+        if not paths:
+            raise CommandError("Nothing to measure, run generate_data first.")
+        results = {}
+        for server in options["servers"]:
+            results[server] = self.run_server(server, paths, options)
+        if options["output"]:
+            write_report(options["output"], {"paths": paths,
+                                             "workers": options["workers"],
+                                             "servers": results})
+
+    def run_server(self, server, paths, options):
+        port = options["port"]
+        process = subprocess.Popen(
+            [sys.executable, "-m", "gunicorn", *SERVERS[server],
+             "--bind", f"127.0.0.1:{port}",
+             "--workers", str(options["workers"]), "--log-level", "warning"],
+            env=os.environ.copy()
+        )
+        runs = []
+        try:
+            _wait_for_port(port, process)
+            # Let every worker render each page once before measuring.
+            http_load("127.0.0.1", port, paths, options["workers"] * 2, 1)
+            for concurrency in options["concurrency"]:
+                latencies, errors, _ = http_load(
+                    "127.0.0.1", port, paths, concurrency, options["seconds"]
+                )
+                run = {"concurrency": concurrency,
+                       "requests_per_second": round(
+                           len(latencies) / options["seconds"], 1),
+                       "errors": errors, **summarize(latencies)}
+                runs.append(run)
+                self.stdout.write(
+                    f"{server:<13} c={concurrency:<4} "
+                    f"{run['requests_per_second']:>8} req/s  "
+                    f"p50 {run['p50_ms']:>9} ms  p99 {run['p99_ms']:>9} ms  "
+                    f"{run['errors']} errors"
+                )
+        finally:
+            process.terminate()
+            process.wait(10)
+        return runs
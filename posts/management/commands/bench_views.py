@@ -0,0 +1,115 @@
+import json
+import time
+import tracemalloc
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.test.utils import setup_test_environment
+
+from posts.benchmarks import summarize, view_targets, write_report
+from posts.management.commands.generate_data import confirm_flush
+from posts.models import Post
+from posts.query_budget import record_queries
+
+
+class Command(BaseCommand):
+    help = ("Render the main views through the test client and report "
+            "p50/p95 latency, query count and peak memory per view.")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--scales", type=int, nargs="+",
+            help="Regenerate the dataset with this many posts before each "
+                 "run (deletes existing data). Without it the current "
+                 "database is measured."
+        )
+        parser.add_argument("--noinput", "--no-input", action="store_false",
+                            dest="interactive",
+                            help="Do not ask before --scales deletes data.")
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--warm", action="store_true",
+                            help="Keep the cache between requests.")
+        parser.add_argument("--output", help="Write a JSON report here.")
+        parser.add_argument("--compare",
+                            help="Print changes against an earlier report.")
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        runs = []
+        if options["scales"]:
+            confirm_flush(options["interactive"])
+        for scale in options["scales"] or [None]:
+            if scale is not None:
+                call_command(
+                    "generate_data", flush=True, interactive=False,
+                    posts=scale,
+                    users=max(100, scale // 50), comments=scale * 2,
+                    stdout=self.stdout
+                )
+            runs.append(self.run(scale, options))
+        report = {"warm": options["warm"], "runs": runs}
+        if options["output"]:
+            write_report(options["output"], report)
+        if options["compare"]:
+            with open(options["compare"]) as previous:
+                self.compare(json.load(previous), report)
+
+    def measure(self, url, user, options):
+        client = Client()
+        if user is not None:
+            client.force_login(user)
+        latencies, queries = [], []
+        for _ in range(options["repeat"]):
+            if not options["warm"]:
+                cache.clear()
+            with record_queries() as recorder:
+                started = time.perf_counter()
+                response = client.get(url)
+                latencies.append(time.perf_counter() - started)
+            queries.append(recorder.count)
+            if response.status_code != 200:
+                raise CommandError(f"{url} returned {response.status_code}")
+        # Allocation tracing slows requests down, so memory is measured
+        # in a separate request.
+        if not options["warm"]:
+            cache.clear()
+        tracemalloc.start()
+        client.get(url)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return {**summarize(latencies), "queries": max(queries),
+                "peak_memory_kb": round(peak / 1024)}
+
+    def run(self, scale, options):
+        results = {}
+        targets = list(view_targets())
+        if not targets:
+            raise CommandError("Nothing to measure, run generate_data first.")
+        for name, url, user in targets:
+            results[name] = self.measure(url, user, options)
+            self.stdout.write(
+                f"{name:<14} p50 {results[name]['p50_ms']:>9} ms  "
+                f"p95 {results[name]['p95_ms']:>9} ms  "
+                f"{results[name]['queries']:>3} queries  "
+                f"{results[name]['peak_memory_kb']:>7} KiB"
+            )
+        return {"scale": scale or Post.objects.count(), "views": results}
+
+    def compare(self, previous, current):
+        before = {run["scale"]: run["views"] for run in previous["runs"]}
+        for run in current["runs"]:
+            old = before.get(run["scale"])
+            if old is None:
+                continue
+            for name, result in run["views"].items():
+                if name not in old:
+                    continue
+                change = result["p95_ms"] - old[name]["p95_ms"]
+                self.stdout.write(
+                    f"{run['scale']:>9} {name:<14} p95 "
+                    f"{old[name]['p95_ms']} -> {result['p95_ms']} ms "
+                    f"({change:+.3f}), queries {old[name]['queries']} -> "
+                    f"{result['queries']}"
+                )
@@ -0,0 +1,35 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import transfer
+
+
+class Command(BaseCommand):
+    help = ("Stream site data to newline-delimited JSON, model by model in "
+            "dependency order. A path ending in .gz is compressed.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", nargs="?", default="yatube.jsonl.gz")
+        parser.add_argument("--models", nargs="+",
+                            default=list(transfer.EXPORT_MODELS),
+                            help="app_label.model names, in dependency "
+                                 "order.")
+        parser.add_argument("--batch-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        try:
+            models = [apps.get_model(label) for label in options["models"]]
+        except (LookupError, ValueError) as error:
+            raise CommandError(error)
+        total = 0
+        with transfer.open_dump(options["path"], "w") as output:
+            for model in models:
+                count = transfer.write_records(
+                    output,
+                    transfer.export_records(model, options["batch_size"])
+                )
+                total += count
+                self.stdout.write(f"{model._meta.label_lower}: {count} rows")
+        self.stdout.write(self.style.SUCCESS(
+            f"Exported {total} rows to {options['path']}."
+        ))
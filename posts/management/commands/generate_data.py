@@ -0,0 +1,254 @@
+import io
+import os
+import random
+from datetime import timedelta
+from itertools import accumulate
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from posts import search
+from posts.models import (Comment, Follow, Group, GroupStats, Post,
+                          ThumbnailJob, TimelineEntry, UserStats)
+from posts.transfer import manual_dates
+
+User = get_user_model()
+
+WORDS = ("пост", "день", "город", "кот", "новости", "погода", "яндекс",
+         "практикум", "django", "python", "код", "тест", "утро", "вечер",
+         "книга", "фильм", "музыка", "дорога", "море", "горы", "работа")
+
+
+def confirm_flush(interactive):
+    """Ask before data is deleted, as ``manage.py flush`` does."""
+    if not interactive:
+        return
+    try:
+        answer = input(
+            "This deletes all posts, groups and non-staff users in the "
+            f"{connection.settings_dict['NAME']!r} database.\n"
+            "Type 'yes' to continue, or 'no' to cancel: "
+        )
+    except EOFError:
+        answer = ""
+    if answer != "yes":
+        raise CommandError("Flush cancelled.")
+
+
+class Command(BaseCommand):
+    help = ("Generate a synthetic dataset: users with a power-law follower "
+            "graph and activity, groups, posts, comments and images.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--posts", type=int, default=10000)
+        parser.add_argument("--comments", type=int, default=20000)
+        parser.add_argument("--groups", type=int, default=20)
+        parser.add_argument("--follows", type=int, default=20,
+                            help="Average number of authors a user follows.")
+        parser.add_argument("--images", type=int, default=0,
+                            help="Number of posts that get an image.")
+        parser.add_argument("--days", type=int, default=365)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--prefix", default="bench")
+        parser.add_argument("--flush", action="store_true",
+                            help="Delete all posts, groups and non-staff "
+                                 "users first.")
+        parser.add_argument("--noinput", "--no-input", action="store_false",
+                            dest="interactive",
+                            help="Do not ask before --flush deletes data.")
+        parser.add_argument("--skip-derived", action="store_true",
+                            help="Do not rebuild counters, timelines and "
+                                 "the search index.")
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options["seed"])
+        self.batch_size = options["batch_size"]
+        self.now = timezone.now()
+        self.span = timedelta(days=options["days"]).total_seconds()
+        if options["flush"]:
+            confirm_flush(options["interactive"])
+            self.flush()
+        if User.objects.filter(
+                username__startswith=f"{options['prefix']}_").exists():
+            raise CommandError(
+                f"Users prefixed {options['prefix']}_ already exist, "
+                "use --flush or another --prefix."
+            )
+
+        user_ids = self.create_users(options["users"], options["prefix"])
+        # Pareto weights give a few very active and very popular accounts
+        # and a long tail, like a real social graph.
+        activity = [self.rng.paretovariate(1.2) for _ in user_ids]
+        popularity = [self.rng.paretovariate(1.1) for _ in user_ids]
+        group_ids = self.create_groups(options["groups"], options["prefix"])
+        post_ids = self.create_posts(options["posts"], user_ids, activity,
+                                     group_ids)
+        self.create_comments(options["comments"], post_ids, user_ids,
+                             activity)
+        self.create_follows(options["follows"], user_ids, popularity)
+        if options["images"]:
+            self.attach_images(options["images"], post_ids)
+        if not options["skip_derived"]:
+            call_command("recount", stdout=self.stdout)
+            call_command("rebuild_timelines", stdout=self.stdout)
+            call_command("rebuild_search_index", stdout=self.stdout)
+
+    def log(self, message):
+        self.stdout.write(message)
+
+    def flush(self):
+        # Tables that reference posts come first.
+        models = [TimelineEntry, ThumbnailJob, Comment, Follow, Post,
+                  UserStats, GroupStats, Group]
+        with connection.cursor() as cursor:
+            for model in models:
+                cursor.execute(f"DELETE FROM {model._meta.db_table}")
+            if search.available():
+                cursor.execute(f"DELETE FROM {search.TABLE}")
+        User.objects.filter(is_staff=False).delete()
+        self.log("Flushed existing data.")
+
+    def random_date(self):
+        return self.now - timedelta(seconds=self.rng.random() * self.span)
+
+    def random_text(self, low, high):
+        return " ".join(self.rng.choices(WORDS, k=self.rng.randint(low,
+                                                                   high)))
+
+    def in_batches(self, total, build):
+        for start in range(0, total, self.batch_size):
+            size = min(self.batch_size, total - start)
+            yield [build(start + offset) for offset in range(size)]
+
+    def weighted(self, population, weights):
+        cum_weights = list(accumulate(weights))
+        return lambda k=1: self.rng.choices(population,
+                                            cum_weights=cum_weights, k=k)
+
+    def create_users(self, total, prefix):
+        password = make_password("password")
+        for batch in self.in_batches(total, lambda number: User(
+                username=f"{prefix}_{number}", password=password,
+                first_name=self.rng.choice(WORDS).title(),
+                last_name=self.rng.choice(WORDS).title())):
+            User.objects.bulk_create(batch)
+        self.log(f"Created {total} users.")
+        return list(User.objects.filter(username__startswith=f"{prefix}_")
+                    .order_by("pk").values_list("pk", flat=True))
+
+    def create_groups(self, total, prefix):
+        Group.objects.bulk_create(
+            Group(title=f"{prefix} {number}", slug=f"{prefix}-{number}",
+                  description=self.random_text(5, 20))
+            for number in range(total)
+        )
+        self.log(f"Created {total} groups.")
+        return list(Group.objects.filter(slug__startswith=f"{prefix}-")
+                    .values_list("pk", flat=True))
+
+    def _last_id(self, model):
+        return model.objects.aggregate(last=Max("pk"))["last"] or 0
+
+    def _ids_after(self, model, last_id):
+        # Rows inserted by one writer in one go get consecutive ids.
+        bounds = model.objects.filter(pk__gt=last_id).aggregate(
+            first=Min("pk"), last=Max("pk")
+        )
+        if bounds["first"] is None:
+            return range(0)
+        return range(bounds["first"], bounds["last"] + 1)
+
+    def create_posts(self, total, user_ids, activity, group_ids):
+        last_id = self._last_id(Post)
+        author = self.weighted(user_ids, activity)
+        fields = [Post._meta.get_field("pub_date"),
+                  Post._meta.get_field("updated")]
+
+        def build(number):
+            pub_date = self.random_date()
+            group = (self.rng.choice(group_ids)
+                     if group_ids and self.rng.random() < 0.3 else None)
+            return Post(author_id=author()[0], group_id=group,
+                        text=self.random_text(5, 60), pub_date=pub_date,
+                        updated=pub_date)
+
+        with manual_dates(*fields):
+            for batch in self.in_batches(total, build):
+                with transaction.atomic():
+                    Post.objects.bulk_create(batch)
+        self.log(f"Created {total} posts.")
+        return self._ids_after(Post, last_id)
+
+    def create_comments(self, total, post_ids, user_ids, activity):
+        if not post_ids:
+            return
+        author = self.weighted(user_ids, activity)
+        # A few posts go viral and collect most of the comments.
+        hot = self.rng.sample(post_ids, k=max(1, len(post_ids) // 100))
+
+        def build(number):
+            if self.rng.random() < 0.5:
+                post_id = self.rng.choice(hot)
+            else:
+                post_id = self.rng.choice(post_ids)
+            return Comment(post_id=post_id, author_id=author()[0],
+                           text=self.random_text(2, 30),
+                           created=self.random_date())
+
+        with manual_dates(Comment._meta.get_field("created")):
+            for batch in self.in_batches(total, build):
+                with transaction.atomic():
+                    Comment.objects.bulk_create(batch)
+        self.log(f"Created {total} comments.")
+
+    def create_follows(self, average, user_ids, popularity):
+        created = 0
+        batch = []
+        author = self.weighted(user_ids, popularity)
+        for user_id in user_ids:
+            count = min(len(user_ids) - 1,
+                        int(self.rng.expovariate(1 / average)) if average
+                        else 0)
+            authors = set(author(count))
+            authors.discard(user_id)
+            batch.extend(Follow(user_id=user_id, author_id=author_id)
+                         for author_id in authors)
+            if len(batch) >= self.batch_size:
+                Follow.objects.bulk_create(batch, ignore_conflicts=True)
+                created += len(batch)
+                batch = []
+        Follow.objects.bulk_create(batch, ignore_conflicts=True)
+        created += len(batch)
+        self.log(f"Created {created} follows.")
+
+    def attach_images(self, total, post_ids):
+        from PIL import Image
+
+        directory = os.path.join(settings.MEDIA_ROOT, "posts")
+        os.makedirs(directory, exist_ok=True)
+        names = []
+        for number in range(min(total, 20)):
+            name = f"posts/generated_{number}.jpg"
+            color = tuple(self.rng.randrange(256) for _ in range(3))
+            image = Image.new("RGB", (1600, 900), color)
+            buffer = io.BytesIO()
+            image.save(buffer, "JPEG", quality=85)
+            with open(os.path.join(settings.MEDIA_ROOT, name), "wb") as file:
+                file.write(buffer.getvalue())
+            names.append(name)
+        chosen = self.rng.sample(post_ids, k=min(total, len(post_ids)))
+        for start in range(0, len(chosen), self.batch_size):
+            with transaction.atomic():
+                for post_id in chosen[start:start + self.batch_size]:
+                    Post.objects.filter(pk=post_id).update(
+                        image=self.rng.choice(names)
+                    )
+        self.log(f"Attached images to {len(chosen)} posts.")
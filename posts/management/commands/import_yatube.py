@@ -0,0 +1,64 @@
+import json
+import os
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import transfer
+
+
+class Command(BaseCommand):
+    help = ("Load a dump written by export_yatube (or a dumpdata JSON array "
+            "such as dump.json) in batches, keeping primary keys. An "
+            "interrupted import continues from its checkpoint.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--batch-size", type=int, default=2000)
+        parser.add_argument("--exclude", nargs="+", default=[],
+                            help="app_label or app_label.model to skip.")
+        parser.add_argument("--restart", action="store_true",
+                            help="Ignore the checkpoint and start over.")
+        parser.add_argument("--skip-derived", action="store_true",
+                            help="Do not rebuild counters, timelines and "
+                                 "the search index.")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        if not os.path.exists(path):
+            raise CommandError(f"{path} does not exist.")
+        checkpoint_path = f"{path}.checkpoint"
+        done = 0
+        if os.path.exists(checkpoint_path) and not options["restart"]:
+            with open(checkpoint_path) as checkpoint:
+                done = json.load(checkpoint)["records"]
+            self.stdout.write(f"Resuming after {done} records.")
+
+        importer = transfer.Importer(options["batch_size"],
+                                     options["exclude"])
+        seen = 0
+        for record in transfer.read_records(path):
+            seen += 1
+            if seen <= done:
+                continue
+            if importer.add(record):
+                self.save_checkpoint(checkpoint_path,
+                                     seen - len(importer.batch))
+        importer.flush()
+        importer.check_constraints()
+        importer.reset_sequences()
+        if os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {seen - done - importer.skipped} records, skipped "
+            f"{importer.skipped}."
+        ))
+        if not options["skip_derived"]:
+            call_command("recount", stdout=self.stdout)
+            call_command("rebuild_timelines", stdout=self.stdout)
+            call_command("rebuild_search_index", stdout=self.stdout)
+
+    def save_checkpoint(self, path, records):
+        with open(path, "w") as checkpoint:
+            json.dump({"records": records}, checkpoint)
+        self.stdout.write(f"{records} records processed")
@@ -0,0 +1,69 @@
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.models import Q
+
+from posts import images
+from posts.models import Post, ThumbnailJob
+
+logger = logging.getLogger(__name__)
+
+
+def _process_chunk(post_ids):
+    done = failed = 0
+    for post_id in post_ids:
+        try:
+            if images.process_post(post_id):
+                done += 1
+        except Exception:
+            logger.exception("Thumbnails of post %s failed", post_id)
+            failed += 1
+    return done, failed
+
+
+class Command(BaseCommand):
+    help = ("Build thumbnails and srcset variants of existing post images "
+            "in parallel on all cores.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=os.cpu_count())
+        parser.add_argument("--chunk-size", type=int, default=50)
+        parser.add_argument("--force", action="store_true",
+                            help="Rebuild thumbnails and variants that "
+                                 "already exist.")
+
+    def map(self, function, chunks, workers):
+        if workers <= 1:
+            yield from map(function, chunks)
+            return
+        # Forked workers must not share the parent's database connection.
+        connections.close_all()
+        context = multiprocessing.get_context("fork")
+        with ProcessPoolExecutor(workers, mp_context=context) as pool:
+            yield from pool.map(function, chunks)
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(image="").exclude(image=None)
+        if not options["force"]:
+            posts = posts.filter(Q(thumbnail="") | Q(image_variants=[]))
+        post_ids = list(posts.order_by("pk").values_list("pk", flat=True))
+        size = options["chunk_size"]
+        chunks = [post_ids[start:start + size]
+                  for start in range(0, len(post_ids), size)]
+        done = failed = 0
+        for chunk_done, chunk_failed in self.map(_process_chunk, chunks,
+                                                 options["workers"]):
+            done += chunk_done
+            failed += chunk_failed
+            self.stdout.write(f"{done}/{len(post_ids)} thumbnails built.")
+        ThumbnailJob.objects.filter(post__thumbnail__gt="").exclude(
+            post__image_variants=[]
+        ).delete()
+        style = self.style.WARNING if failed else self.style.SUCCESS
+        self.stdout.write(style(
+            f"Built {done} of {len(post_ids)} thumbnails, {failed} failed."
+        ))
@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from posts import images
+
+
+class Command(BaseCommand):
+    help = "Work the thumbnail job queue filled when posts get an image."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true",
+                            help="Exit when the queue is empty.")
+        parser.add_argument("--batch-size", type=int, default=20)
+        parser.add_argument("--interval", type=float, default=1.0,
+                            help="Seconds to sleep when the queue is empty.")
+
+    def handle(self, *args, **options):
+        while True:
+            close_old_connections()
+            jobs = images.claim_jobs(options["batch_size"])
+            for pk, post_id in jobs:
+                if images.run_job(pk, post_id):
+                    self.stdout.write(f"Thumbnail of post {post_id} ready.")
+                else:
+                    self.stderr.write(f"Thumbnail of post {post_id} failed "
+                                      "or was outdated, will retry.")
+            if not jobs:
+                if options["once"]:
+                    break
+                time.sleep(options["interval"])
@@ -0,0 +1,120 @@
+import os
+import pstats
+import statistics
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.profiling import read_captures
+
+
+class Command(BaseCommand):
+    help = ("Summarize the captures of ProfilingMiddleware: hot functions "
+            "and slowest SQL per view.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dir", default=settings.PROFILING_DIR)
+        parser.add_argument("--view", nargs="+",
+                            help="Only these URL names.")
+        parser.add_argument("--top", type=int, default=15)
+        parser.add_argument("--slow-only", action="store_true",
+                            help="Skip captures that were only sampled.")
+        parser.add_argument("--collapsed",
+                            help="Also merge the stacks of each view into "
+                                 "<this prefix>-<view>.collapsed for "
+                                 "flamegraph.pl or speedscope.")
+
+    def handle(self, *args, **options):
+        if not os.path.isdir(options["dir"]):
+            raise CommandError(f"No captures in {options['dir']}.")
+        captures = defaultdict(list)
+        for meta in read_captures(options["dir"]):
+            if options["view"] and meta["view"] not in options["view"]:
+                continue
+            if options["slow_only"] and not meta["slow"]:
+                continue
+            captures[meta["view"]].append(meta)
+        if not captures:
+            raise CommandError("No captures match.")
+        for view, metas in sorted(captures.items()):
+            self.summarize(view, metas, options)
+
+    def summarize(self, view, metas, options):
+        durations = [meta["duration_ms"] for meta in metas]
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"{view}: {len(metas)} captures "
+            f"({sum(meta['slow'] for meta in metas)} slow), "
+            f"median {statistics.median(durations):.1f} ms, "
+            f"max {max(durations):.1f} ms"
+        ))
+        stacks = Counter()
+        for meta in metas:
+            try:
+                with open(meta["base"] + ".collapsed") as file:
+                    for line in file:
+                        stack, _, count = line.rstrip("\n").rpartition(" ")
+                        stacks[stack] += int(count)
+            except OSError:
+                continue
+        self.hot_functions(stacks, options["top"])
+        self.profiled_functions(metas, options["top"])
+        self.slow_queries(metas, options["top"])
+        if options["collapsed"] and stacks:
+            path = f"{options['collapsed']}-{view}.collapsed"
+            with open(path, "w") as file:
+                for stack, count in stacks.most_common():
+                    file.write(f"{stack} {count}\n")
+            self.stdout.write(f"  Stacks written to {path}")
+
+    def hot_functions(self, stacks, top):
+        total = sum(stacks.values())
+        if not total:
+            return
+        own, inclusive = Counter(), Counter()
+        for stack, count in stacks.items():
+            frames = stack.split(";")
+            own[frames[-1]] += count
+            for frame in set(frames):
+                inclusive[frame] += count
+        self.stdout.write(f"  Sampled stacks ({total} samples), own time:")
+        for frame, count in own.most_common(top):
+            self.stdout.write(f"  {100 * count / total:6.1f}%  {frame}")
+        self.stdout.write("  Including callees:")
+        # The outermost frames are in every stack and say nothing.
+        shown = [(frame, count) for frame, count in inclusive.most_common()
+                 if count < total][:top]
+        for frame, count in shown:
+            self.stdout.write(f"  {100 * count / total:6.1f}%  {frame}")
+
+    def profiled_functions(self, metas, top):
+        files = [meta["base"] + ".prof" for meta in metas
+                 if meta["sampled"] and os.path.exists(meta["base"]
+                                                       + ".prof")]
+        if not files:
+            return
+        self.stdout.write(f"  cProfile of {len(files)} sampled requests, "
+                          "by own time:")
+        stats = pstats.Stats(*files).stats
+        rows = sorted(stats.items(), key=lambda item: item[1][2],
+                      reverse=True)
+        for (filename, line, function), (_, calls, own, total, _) in (
+                rows[:top]):
+            self.stdout.write(
+                f"  {own * 1000:9.1f} ms own {total * 1000:9.1f} ms total "
+                f"{calls:>7}x  {function} ({os.path.basename(filename)}:"
+                f"{line})"
+            )
+
+    def slow_queries(self, metas, top):
+        time_by_sql, runs = Counter(), Counter()
+        for meta in metas:
+            for sql, elapsed in meta["queries"]:
+                time_by_sql[sql] += elapsed
+                runs[sql] += 1
+        if not time_by_sql:
+            return
+        self.stdout.write("  SQL by total time:")
+        for sql, elapsed in time_by_sql.most_common(top):
+            self.stdout.write(f"  {elapsed:9.1f} ms {runs[sql]:>5}x  "
+                              f"{sql[:160]}")
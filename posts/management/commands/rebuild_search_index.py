@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import search
+
+
+class Command(BaseCommand):
+    help = "Refill the full-text search index from posts and comments."
+
+    def handle(self, *args, **options):
+        if not search.available():
+            raise CommandError("Full-text search needs SQLite with FTS5.")
+        search.rebuild()
+        self.stdout.write(self.style.SUCCESS("Search index rebuilt."))
@@ -0,0 +1,31 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+
+from posts import timeline
+from posts.models import Follow, TimelineEntry
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Rebuild follow timelines from Follow and Post from scratch."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", action="append", dest="usernames",
+                            help="Only rebuild timelines of these users.")
+
+    def handle(self, *args, **options):
+        cache.delete(timeline.PULL_AUTHORS_KEY)
+        if options["usernames"]:
+            users = User.objects.filter(username__in=options["usernames"])
+            user_ids = list(users.values_list("pk", flat=True))
+        else:
+            TimelineEntry.objects.all().delete()
+            user_ids = list(Follow.objects.order_by("user_id")
+                            .values_list("user_id", flat=True).distinct())
+        for user_id in user_ids:
+            timeline.rebuild(user_id)
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {len(user_ids)} timelines."
+        ))
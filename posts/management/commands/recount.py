@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from posts import counters
+
+
+class Command(BaseCommand):
+    help = "Recompute denormalized post, follow and comment counters."
+
+    def handle(self, *args, **options):
+        fixed = counters.recount_all()
+        self.stdout.write(self.style.SUCCESS(
+            f"Recounted stats, {fixed} rows were missing or had drifted."
+        ))
@@ -0,0 +1,103 @@
+import json
+import os
+import subprocess
+import sys
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.benchmarks import write_report
+
+# Runs in a fresh interpreter, so nothing is imported yet.
+STARTUP_SCRIPT = """
+import json, os, time
+started = time.perf_counter()
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "yatube.settings")
+from django.core.wsgi import get_wsgi_application
+get_wsgi_application()
+loaded = time.perf_counter() - started
+from posts import warmup
+print(json.dumps({"load_app": loaded, "warm_up": warmup.warm_up()}))
+"""
+
+
+def parse_importtime(lines):
+    """``{module: (self us, cumulative us)}`` from ``-X importtime``."""
+    modules = {}
+    for line in lines:
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        if not own.strip().isdigit():
+            continue
+        modules[name.strip()] = (int(own), int(cumulative))
+    return modules
+
+
+class Command(BaseCommand):
+    help = ("Start the app in a fresh interpreter and report import time "
+            "per module and package, app loading and warm-up steps.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--top", type=int, default=20)
+        parser.add_argument("--output", help="Write a JSON report here.")
+        parser.add_argument("--compare",
+                            help="Print changes against an earlier report.")
+
+    def handle(self, *args, **options):
+        env = {**os.environ, "WARMUP": ""}
+        process = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", STARTUP_SCRIPT],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True
+        )
+        if process.returncode:
+            raise CommandError(process.stderr[-2000:])
+        phases = json.loads(process.stdout.strip().splitlines()[-1])
+        modules = parse_importtime(process.stderr.splitlines())
+        packages = Counter()
+        for name, (own, _) in modules.items():
+            packages[name.split(".")[0]] += own
+
+        report = {
+            "phases_ms": {
+                "imports": round(sum(own for own, _ in modules.values())
+                                 / 1000, 1),
+                "load_app": round(phases["load_app"] * 1000, 1),
+                **{f"warm_up_{step}": round(seconds * 1000, 1)
+                   for step, seconds in phases["warm_up"].items()},
+            },
+            "packages_ms": {name: round(own / 1000, 1)
+                            for name, own in packages.most_common()},
+            "modules_ms": {
+                name: round(cumulative / 1000, 1)
+                for name, (_, cumulative) in sorted(
+                    modules.items(), key=lambda item: -item[1][1]
+                )[:options["top"]]
+            },
+        }
+        self.stdout.write("Phases:")
+        for name, value in report["phases_ms"].items():
+            self.stdout.write(f"  {name:<20} {value:>9} ms")
+        self.stdout.write("Packages by own import time:")
+        for name, value in list(report["packages_ms"].items())[
+                :options["top"]]:
+            self.stdout.write(f"  {name:<20} {value:>9} ms")
+        self.stdout.write("Modules by cumulative import time:")
+        for name, value in report["modules_ms"].items():
+            self.stdout.write(f"  {name:<40} {value:>9} ms")
+        if options["output"]:
+            write_report(options["output"], report)
+        if options["compare"]:
+            with open(options["compare"]) as previous:
+                self.compare(json.load(previous), report)
+
+    def compare(self, previous, current):
+        for section in ("phases_ms", "packages_ms"):
+            old = previous.get(section, {})
+            for name, value in current[section].items():
+                if name in old and abs(value - old[name]) >= 1:
+                    self.stdout.write(
+                        f"{name:<20} {old[name]} -> {value} ms "
+                        f"({value - old[name]:+.1f})"
+                    )
@@ -0,0 +1,308 @@
+"""Request timings for ``Server-Timing`` and a Prometheus ``/metrics`` page.
+
+``MetricsMiddleware`` measures every request: total time, SQL queries and
+their time (through ``execute_wrapper`` on every database alias), the
+cache hits and misses the page, fragment and timeline caches report with
+``cache_lookup``, template rendering (``TimedDjangoTemplates``) and
+thumbnail work. The numbers are sent back in the ``Server-Timing`` header
+and added to histograms labelled with the URL name.
+
+Every process keeps its histograms in memory and, when ``METRICS_DIR`` is
+set, writes them to ``<METRICS_DIR>/<pid>.json`` at most every
+``METRICS_FLUSH_INTERVAL`` seconds; ``/metrics`` adds up the files of all
+gunicorn workers. A worker that gets the pid of an earlier one starts
+from its file, so counters never go down.
+"""
+import json
+import os
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse
+from django.template.backends.django import DjangoTemplates
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5,
+                    10)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50, 100)
+HISTOGRAMS = {
+    "yatube_request_duration_seconds": (
+        "Time to build a response.", DURATION_BUCKETS),
+    "yatube_db_duration_seconds": (
+        "Time spent in SQL queries per request.", DURATION_BUCKETS),
+    "yatube_db_queries": ("SQL queries per request.", QUERY_BUCKETS),
+    "yatube_template_duration_seconds": (
+        "Time spent rendering templates per request.", DURATION_BUCKETS),
+}
+COUNTERS = {
+    "yatube_requests_total": "Responses by status code.",
+    "yatube_cache_hits_total": "Page, fragment and timeline cache hits.",
+    "yatube_cache_misses_total": "Page, fragment and timeline cache misses.",
+    "yatube_thumbnail_seconds_total": "Time spent building thumbnails.",
+}
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_current = ContextVar("request_metrics", default=None)
+_lock = threading.Lock()
+_state = {"pid": None, "flushed": 0.0, "histograms": {}, "counters": {}}
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.queries = 0
+        self.db = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.template = 0.0
+        self.thumbnail = 0.0
+        self.timing = set()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db += time.perf_counter() - started
+            self.queries += 1
+
+    def server_timing(self, total):
+        parts = [
+            f'db;dur={self.db * 1000:.1f};desc="{self.queries} queries"',
+            f'cache;desc="{self.cache_hits} hits, '
+            f'{self.cache_misses} misses"',
+            f"tpl;dur={self.template * 1000:.1f}",
+        ]
+        if self.thumbnail:
+            parts.append(f"thumb;dur={self.thumbnail * 1000:.1f}")
+        parts.append(f"total;dur={total * 1000:.1f}")
+        return ", ".join(parts)
+
+
+def cache_lookup(hits, misses):
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.cache_hits += hits
+        metrics.cache_misses += misses
+
+
+@contextmanager
+def timed(name):
+    """Add the time of the block to ``name`` of the current request.
+
+    Nested blocks of the same name (an include rendering a template) are
+    counted once.
+    """
+    metrics = _current.get()
+    if metrics is None or name in metrics.timing:
+        yield
+        return
+    metrics.timing.add(name)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        setattr(metrics, name,
+                getattr(metrics, name) + time.perf_counter() - started)
+        metrics.timing.discard(name)
+
+
+@contextmanager
+def track_queries():
+    """Count queries of this thread's connections for the current request."""
+    metrics = _current.get()
+    if metrics is None:
+        yield
+        return
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(metrics))
+        yield
+
+
+class _TimedTemplate:
+    def __init__(self, template):
+        self.template = template
+
+    def __getattr__(self, name):
+        return getattr(self.template, name)
+
+    def render(self, context=None, request=None):
+        with timed("template"):
+            return self.template.render(context, request)
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """The Django template backend, timing every top-level render."""
+
+    def from_string(self, template_code):
+        return _TimedTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return _TimedTemplate(super().get_template(template_name))
+
+
+def _path(pid):
+    return os.path.join(settings.METRICS_DIR, f"{pid}.json")
+
+
+def _load(path):
+    try:
+        with open(path) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {"histograms": {}, "counters": {}}
+
+
+def _own_state():
+    # Forked workers must not report what their parent had counted.
+    pid = os.getpid()
+    if _state["pid"] != pid:
+        saved = (_load(_path(pid)) if settings.METRICS_DIR
+                 else {"histograms": {}, "counters": {}})
+        _state.update(pid=pid, flushed=time.monotonic(),
+                      histograms=saved["histograms"],
+                      counters=saved["counters"])
+    return _state
+
+
+def _observe(state, name, labels, value):
+    buckets = HISTOGRAMS[name][1]
+    series = state["histograms"].setdefault(name, {}).setdefault(
+        labels, [0] * (len(buckets) + 2)
+    )
+    for index, bound in enumerate(buckets):
+        if value <= bound:
+            series[index] += 1
+            break
+    else:
+        series[len(buckets)] += 1
+    series[-1] += value
+
+
+def _increment(state, name, labels, value=1):
+    series = state["counters"].setdefault(name, {})
+    series[labels] = series.get(labels, 0) + value
+
+
+def observe(view, status, duration, metrics):
+    labels = f'view="{view}"'
+    with _lock:
+        state = _own_state()
+        _observe(state, "yatube_request_duration_seconds", labels, duration)
+        _observe(state, "yatube_db_duration_seconds", labels, metrics.db)
+        _observe(state, "yatube_db_queries", labels, metrics.queries)
+        _observe(state, "yatube_template_duration_seconds", labels,
+                 metrics.template)
+        _increment(state, "yatube_requests_total",
+                   f'{labels},status="{status}"')
+        _increment(state, "yatube_cache_hits_total", labels,
+                   metrics.cache_hits)
+        _increment(state, "yatube_cache_misses_total", labels,
+                   metrics.cache_misses)
+        _increment(state, "yatube_thumbnail_seconds_total", labels,
+                   metrics.thumbnail)
+        snapshot = None
+        now = time.monotonic()
+        if (settings.METRICS_DIR
+                and now - state["flushed"] >= settings.METRICS_FLUSH_INTERVAL):
+            state["flushed"] = now
+            snapshot = json.dumps({"histograms": state["histograms"],
+                                   "counters": state["counters"]})
+    if snapshot is not None:
+        _write(snapshot)
+
+
+def _write(snapshot):
+    path = _path(os.getpid())
+    os.makedirs(settings.METRICS_DIR, exist_ok=True)
+    temporary = f"{path}.tmp"
+    with open(temporary, "w") as file:
+        file.write(snapshot)
+    os.replace(temporary, path)
+
+
+def _merge(total, part):
+    for name, series in part.get("histograms", {}).items():
+        merged = total["histograms"].setdefault(name, {})
+        for labels, values in series.items():
+            if labels in merged:
+                merged[labels] = [a + b for a, b in zip(merged[labels],
+                                                        values)]
+            else:
+                merged[labels] = list(values)
+    for name, series in part.get("counters", {}).items():
+        merged = total["counters"].setdefault(name, {})
+        for labels, value in series.items():
+            merged[labels] = merged.get(labels, 0) + value
+
+
+def collect():
+    """Histograms and counters of every worker, added up."""
+    total = {"histograms": {}, "counters": {}}
+    with _lock:
+        state = _own_state()
+        _merge(total, state)
+    own = f"{os.getpid()}.json"
+    if settings.METRICS_DIR and os.path.isdir(settings.METRICS_DIR):
+        for name in os.listdir(settings.METRICS_DIR):
+            if name.endswith(".json") and name != own:
+                _merge(total, _load(os.path.join(settings.METRICS_DIR,
+                                                 name)))
+    return total
+
+
+def _number(value):
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def render(total):
+    lines = []
+    for name, (help_text, buckets) in HISTOGRAMS.items():
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+        for labels, values in sorted(total["histograms"]
+                                     .get(name, {}).items()):
+            cumulative = 0
+            for bound, count in zip(buckets, values):
+                cumulative += count
+                lines.append(f'{name}_bucket{{{labels},le="{bound}"}} '
+                             f"{cumulative}")
+            count = cumulative + values[len(buckets)]
+            lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {count}')
+            lines.append(f"{name}_sum{{{labels}}} {_number(values[-1])}")
+            lines.append(f"{name}_count{{{labels}}} {count}")
+    for name, help_text in COUNTERS.items():
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+        for labels, value in sorted(total["counters"].get(name, {})
+                                    .items()):
+            lines.append(f"{name}{{{labels}}} {_number(value)}")
+    return "\n".join(lines) + "\n"
+
+
+def metrics_view(request):
+    return HttpResponse(render(collect()), content_type=CONTENT_TYPE)
+
+
+class MetricsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.METRICS_ENABLED:
+            return self.get_response(request)
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        started = time.perf_counter()
+        try:
+            with track_queries():
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        duration = time.perf_counter() - started
+        response["Server-Timing"] = metrics.server_timing(duration)
+        match = request.resolver_match
+        view = match.url_name if match and match.url_name else "other"
+        observe(view, response.status_code, duration, metrics)
+        return response
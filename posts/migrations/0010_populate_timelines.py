@@ -0,0 +1,29 @@
+from django.conf import settings
+from django.db import migrations
+
+
+def populate_timelines(apps, schema_editor):
+    Follow = apps.get_model("posts", "Follow")
+    Post = apps.get_model("posts", "Post")
+    TimelineEntry = apps.get_model("posts", "TimelineEntry")
+    for user_id, author_id in Follow.objects.values_list("user_id",
+                                                         "author_id"):
+        posts = (Post.objects.filter(author_id=author_id)
+                 .order_by("-pub_date")
+                 .values_list("pk", "pub_date")[:settings.TIMELINE_SIZE])
+        TimelineEntry.objects.bulk_create(
+            [TimelineEntry(user_id=user_id, post_id=pk, pub_date=pub_date)
+             for pk, pub_date in posts],
+            batch_size=500, ignore_conflicts=True
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0009_timelineentry'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_timelines, migrations.RunPython.noop),
+    ]
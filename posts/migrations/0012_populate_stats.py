@@ -0,0 +1,41 @@
+from django.conf import settings
+from django.db import migrations
+from django.db.models import Count
+
+
+def populate_stats(apps, schema_editor):
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split("."))
+    Group = apps.get_model("posts", "Group")
+    UserStats = apps.get_model("posts", "UserStats")
+    GroupStats = apps.get_model("posts", "GroupStats")
+    users = User.objects.annotate(
+        posts_total=Count("posts", distinct=True),
+        followers_total=Count("following", distinct=True),
+        following_total=Count("follower", distinct=True),
+    )
+    UserStats.objects.bulk_create(
+        [UserStats(user_id=user.pk,
+                   posts_count=user.posts_total,
+                   followers_count=user.followers_total,
+                   following_count=user.following_total)
+         for user in users.iterator()],
+        batch_size=500
+    )
+    groups = Group.objects.annotate(posts_total=Count("posts_in_group"))
+    GroupStats.objects.bulk_create(
+        [GroupStats(group_id=group.pk, posts_count=group.posts_total)
+         for group in groups.iterator()],
+        batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0011_stats'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+from django.db import migrations
+
+CREATE = """
+CREATE VIRTUAL TABLE IF NOT EXISTS posts_search USING fts5(
+    text, post_id UNINDEXED, comment_id UNINDEXED,
+    tokenize = 'unicode61 remove_diacritics 2'
+)
+"""
+FILL = [
+    "INSERT INTO posts_search (rowid, text, post_id, comment_id) "
+    "SELECT id * 2, text, id, NULL FROM posts_post",
+    "INSERT INTO posts_search (rowid, text, post_id, comment_id) "
+    "SELECT id * 2 + 1, text, post_id, id FROM posts_comment",
+]
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    schema_editor.execute(CREATE)
+    for statement in FILL:
+        schema_editor.execute(statement)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "sqlite":
+        schema_editor.execute("DROP TABLE IF EXISTS posts_search")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0013_post_updated'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -22,13 +22,43 @@ class Post(models.Model):
                               related_name="posts_in_group",
                               blank=True, null=True)
     image = models.ImageField(upload_to="posts/", blank=True, null=True)
+    thumbnail = models.CharField(max_length=255, blank=True, editable=False)
+    image_variants = models.JSONField(default=list, blank=True,
+                                      editable=False)
+    updated = models.DateTimeField("date updated", auto_now=True)
+    comments_count = models.PositiveIntegerField(default=0, editable=False)
 
     class Meta:
         ordering = ["-pub_date"]
+        indexes = [
+            models.Index(fields=["-pub_date", "-id"], name="post_pub_date"),
+            models.Index(fields=["author", "-pub_date", "-id"],
+                         name="post_author_pub_date"),
+            models.Index(fields=["group", "-pub_date", "-id"],
+                         name="post_group_pub_date"),
+        ]
 
     def __str__(self):
         return self.text
 
+    @property
+    def thumbnail_url(self):
+        if not self.thumbnail:
+            return ""
+        return self.image.storage.url(self.thumbnail)
+
+    @property
+    def image_sources(self):
+        """``(mime type, srcset)`` pairs of the variants, best format first."""
+        srcsets = {}
+        for variant in self.image_variants:
+            url = self.image.storage.url(variant["name"])
+            srcsets.setdefault(variant["format"], []).append(
+                f"{url} {variant['width']}w"
+            )
+        return [(f"image/{image_format}", ", ".join(srcset))
+                for image_format, srcset in srcsets.items()]
+
 
 class Comment(models.Model):
     post = models.ForeignKey(Post, on_delete=models.CASCADE,
@@ -40,6 +70,8 @@ class Comment(models.Model):
 
     class Meta:
         ordering = ["-created"]
+        indexes = [models.Index(fields=["post", "-created", "-id"],
+                                name="comment_post_created")]
 
 
 class Follow(models.Model):
@@ -51,3 +83,45 @@ class Follow(models.Model):
     class Meta:
         constraints = [models.UniqueConstraint(fields=["user", "author"],
                                                name="following_unique")]
+        indexes = [models.Index(fields=["author", "user"],
+                                name="follow_author_user")]
+
+
+class TimelineEntry(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE,
+                             related_name="timeline")
+    post = models.ForeignKey(Post, on_delete=models.CASCADE,
+                             related_name="timeline_entries")
+    pub_date = models.DateTimeField()
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=["user", "post"],
+                                               name="timeline_unique")]
+        indexes = [models.Index(fields=["user", "-pub_date", "-post"],
+                                name="timeline_user_pub_date")]
+
+
+class UserStats(models.Model):
+    user = models.OneToOneField(User, on_delete=models.CASCADE,
+                                primary_key=True, related_name="stats")
+    posts_count = models.PositiveIntegerField(default=0)
+    followers_count = models.PositiveIntegerField(default=0, db_index=True)
+    following_count = models.PositiveIntegerField(default=0)
+
+
+class GroupStats(models.Model):
+    group = models.OneToOneField(Group, on_delete=models.CASCADE,
+                                 primary_key=True, related_name="stats")
+    posts_count = models.PositiveIntegerField(default=0)
+
+
+class ThumbnailJob(models.Model):
+    post = models.OneToOneField(Post, on_delete=models.CASCADE,
+                                related_name="thumbnail_job")
+    created = models.DateTimeField(auto_now_add=True)
+    locked_until = models.DateTimeField(blank=True, null=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ["created"]
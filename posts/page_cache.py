@@ -0,0 +1,184 @@
+"""Versioned full-page cache with event-driven invalidation.
+
+A cached page remembers the generation of every scope it was built from
+(``"posts"``, ``"group:<slug>"``, ``"user:<username>"``, ...). Model
+signals bump those generations once the write commits, so a page is
+fresh until something it shows changes and the TTL can be long. A stale
+copy is kept and served to concurrent requests while a single request
+rebuilds the page.
+
+The same generations make cheap HTTP validators: ``conditional_page``
+answers ``If-None-Match``/``If-Modified-Since`` with ``304 Not Modified``
+before the view runs, without rendering anything.
+"""
+import hashlib
+import time
+from datetime import datetime, timezone
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+from posts import edge_cache, metrics
+
+LOCK_TIMEOUT = 10
+LOCK_WAIT = 0.05
+LOCK_RETRIES = 20
+
+
+def _generation_key(scope):
+    return f"generation:{scope}"
+
+
+def _modified_key(scope):
+    return f"modified:{scope}"
+
+
+def generations(scopes):
+    keys = [_generation_key(scope) for scope in scopes]
+    found = cache.get_many(keys)
+    for scope, key in zip(scopes, keys):
+        if key not in found:
+            # Restarting from a fresh value rather than 1 means a page
+            # cached before the counter was evicted can never look fresh.
+            cache.add(key, time.time_ns(), None)
+            cache.add(_modified_key(scope), time.time(), None)
+            found[key] = cache.get(key)
+    return tuple(found[key] for key in keys)
+
+
+def modified_at(scopes):
+    """When the newest of ``scopes`` last changed, None if unknown."""
+    keys = [_modified_key(scope) for scope in scopes]
+    found = cache.get_many(keys)
+    if not keys or len(found) != len(keys):
+        return None
+    return datetime.fromtimestamp(max(found.values()), tz=timezone.utc)
+
+
+def _bump_now(scopes):
+    now = time.time()
+    for scope in scopes:
+        key = _generation_key(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, time.time_ns(), None)
+    cache.set_many({_modified_key(scope): now for scope in scopes}, None)
+    edge_cache.purge(scopes)
+
+
+def bump(*scopes):
+    """Move ``scopes`` to a new generation once the transaction commits.
+
+    Bumping earlier would let a request that reads the pre-commit rows
+    store its page under the new generation, where it stays stale.
+    """
+    scopes = list(scopes)
+    transaction.on_commit(lambda: _bump_now(scopes))
+
+
+def _page_key(request, prefix):
+    user = request.user
+    viewer = user.pk if user.is_authenticated else "anon"
+    path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return f"page:{prefix}:{viewer}:{path}"
+
+
+def _from_entry(entry):
+    response = HttpResponse(entry["content"],
+                            content_type=entry["content_type"])
+    response["X-Page-Cache"] = entry.get("state", "hit")
+    return response
+
+
+def versioned_cache_page(scopes, timeout=None):
+    """Cache a view per viewer and URL until one of its scopes changes.
+
+    ``scopes`` is called with the view arguments and returns the list of
+    scope names the page depends on.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ("GET", "HEAD"):
+                return view(request, *args, **kwargs)
+            versions = generations(scopes(request, *args, **kwargs))
+            key = _page_key(request, view.__name__)
+            entry = cache.get(key)
+            if entry and entry["versions"] == versions:
+                metrics.cache_lookup(1, 0)
+                return _from_entry(entry)
+            metrics.cache_lookup(0, 1)
+
+            lock = f"{key}:lock"
+            if not cache.add(lock, 1, LOCK_TIMEOUT):
+                if entry:
+                    entry["state"] = "stale"
+                    return _from_entry(entry)
+                for _ in range(LOCK_RETRIES):
+                    time.sleep(LOCK_WAIT)
+                    entry = cache.get(key)
+                    if entry and entry["versions"] == versions:
+                        return _from_entry(entry)
+                return view(request, *args, **kwargs)
+
+            try:
+                response = view(request, *args, **kwargs)
+                if (response.status_code == 200
+                        and not response.streaming
+                        and not response.cookies):
+                    cache.set(key, {
+                        "versions": versions,
+                        "content": response.content,
+                        "content_type": response["Content-Type"],
+                    }, timeout or settings.PAGE_CACHE_TIMEOUT)
+            finally:
+                cache.delete(lock)
+            return response
+        return wrapper
+    return decorator
+
+
+def _viewer(request):
+    user = request.user
+    return user.pk if user.is_authenticated else "anon"
+
+
+def conditional_page(scopes):
+    """Add ``ETag``/``Last-Modified`` derived from scope generations.
+
+    The ETag covers the viewer, the URL and the generations, so it changes
+    with anything the page shows. Pages differ per viewer, hence
+    ``Vary: Cookie``. Stale copies from ``versioned_cache_page`` get no
+    validators, or a client could keep them as if they were current.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ("GET", "HEAD"):
+                return view(request, *args, **kwargs)
+            page_scopes = scopes(request, *args, **kwargs)
+            raw = (f"{_viewer(request)}:{request.get_full_path()}:"
+                   f"{generations(page_scopes)}")
+            etag = quote_etag(hashlib.md5(raw.encode()).hexdigest())
+            modified = modified_at(page_scopes)
+            last_modified = modified and int(modified.timestamp())
+            response = get_conditional_response(
+                request, etag=etag, last_modified=last_modified
+            )
+            if response is None:
+                response = view(request, *args, **kwargs)
+            if (response.status_code in (200, 304)
+                    and response.get("X-Page-Cache") != "stale"):
+                response["ETag"] = etag
+                if last_modified:
+                    response["Last-Modified"] = http_date(last_modified)
+            patch_vary_headers(response, ("Cookie",))
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,173 @@
+import base64
+import json
+from collections.abc import Sequence
+
+from django.db.models import Q
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+class KeysetPage(Sequence):
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        return f"<KeysetPage of {len(self.object_list)} items>"
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    def next_cursor(self):
+        if not self._has_next or not self.object_list:
+            return None
+        return self.paginator.encode_cursor(self.object_list[-1])
+
+    def previous_cursor(self):
+        if not self._has_previous or not self.object_list:
+            return None
+        return self.paginator.encode_cursor(self.object_list[0])
+
+
+class KeysetPaginator:
+    """Cursor pagination over a queryset ordered by ``keys`` descending.
+
+    Pages are addressed by opaque ``?after=``/``?before=`` tokens built from
+    the key values of the boundary rows, so neither ``COUNT(*)`` nor
+    ``OFFSET`` is needed to fetch a page. The old ``?page=N`` links still
+    work: they fall back to a single offset query and the links rendered
+    from such a page are cursors again.
+    """
+
+    def __init__(self, queryset, per_page, keys=("pub_date", "id"),
+                 count_limit=1000):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        self.keys = tuple(keys)
+        self.count_limit = count_limit
+        self._fields = [queryset.model._meta.get_field(key)
+                        for key in self.keys]
+
+    def encode_cursor(self, obj):
+        values = [field.value_to_string(obj) for field in self._fields]
+        raw = json.dumps(values, separators=(",", ":")).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    def decode_cursor(self, token):
+        try:
+            padded = token + "=" * (-len(token) % 4)
+            values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            if len(values) != len(self._fields):
+                raise ValueError(token)
+            return [field.to_python(value)
+                    for field, value in zip(self._fields, values)]
+        except Exception as error:
+            raise InvalidCursor(token) from error
+
+    def _seek(self, values, direction, keys=None):
+        # (k1, k2) < (v1, v2) expanded for databases without row values.
+        keys = keys or self.keys
+        condition = Q()
+        for index, key in enumerate(keys):
+            step = Q(**{f"{key}__{direction}": values[index]})
+            for prev_key, prev_value in zip(keys[:index], values[:index]):
+                step &= Q(**{prev_key: prev_value})
+            condition |= step
+        return condition
+
+    def _ordered(self, descending=True):
+        prefix = "-" if descending else ""
+        return self.queryset.order_by(*[prefix + key for key in self.keys])
+
+    def _rows(self, values=None, direction="lt", offset=0):
+        """Fetch up to ``per_page + 1`` rows past ``values``.
+
+        ``direction`` is ``"lt"`` to walk towards older rows (returned
+        newest first) and ``"gt"`` to walk back (returned oldest first).
+        """
+        queryset = self._ordered(descending=direction == "lt")
+        if values is not None:
+            queryset = queryset.filter(self._seek(values, direction))
+        return list(queryset[offset:offset + self.per_page + 1])
+
+    def page_after(self, token=None):
+        values = self.decode_cursor(token) if token else None
+        rows = self._rows(values)
+        return KeysetPage(rows[:self.per_page], self,
+                          has_next=len(rows) > self.per_page,
+                          has_previous=bool(token))
+
+    def page_before(self, token):
+        rows = self._rows(self.decode_cursor(token), "gt")
+        has_previous = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        rows.reverse()
+        return KeysetPage(rows, self, has_next=True,
+                          has_previous=has_previous)
+
+    def page_number(self, number):
+        rows = self._rows(offset=(number - 1) * self.per_page)
+        if not rows:
+            return self.page_after()
+        return KeysetPage(rows[:self.per_page], self,
+                          has_next=len(rows) > self.per_page,
+                          has_previous=number > 1)
+
+    def get_page(self, params):
+        """Return the page addressed by request GET ``params``.
+
+        Broken tokens and page numbers fall back to the first page, the
+        same way ``Paginator.get_page`` treats an invalid number.
+        """
+        try:
+            if params.get("before"):
+                page = self.page_before(params["before"])
+                if not page.object_list:
+                    return self.page_after()
+                return page
+            if params.get("after"):
+                return self.page_after(params["after"])
+        except InvalidCursor:
+            return self.page_after()
+        try:
+            number = int(params.get("page") or 1)
+        except (TypeError, ValueError):
+            number = 1
+        if number > 1:
+            return self.page_number(number)
+        return self.page_after()
+
+    @property
+    def count(self):
+        """Number of rows, capped at ``count_limit`` to keep it cheap."""
+        if not hasattr(self, "_count"):
+            limit = self.count_limit
+            queryset = self.queryset.order_by()
+            if limit is not None:
+                queryset = queryset[:limit + 1]
+            self._count = queryset.count()
+        if self.count_limit is not None:
+            return min(self._count, self.count_limit)
+        return self._count
+
+    @property
+    def count_is_capped(self):
+        return (self.count_limit is not None
+                and self.count >= self.count_limit
+                and self._count > self.count_limit)
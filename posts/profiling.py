@@ -0,0 +1,180 @@
+"""Opt-in profiling of sampled and slow requests.
+
+With ``PROFILING_ENABLED`` on, ``ProfilingMiddleware`` runs a random
+``PROFILING_SAMPLE_RATE`` share of requests under cProfile. A sampler
+thread records the stacks of every request in progress each
+``PROFILING_INTERVAL`` seconds, so any request slower than
+``PROFILING_SLOW_MS`` can be kept once it turns out to be slow. A capture
+is written to ``PROFILING_DIR`` as ``<name>.json`` (view, timings and the
+SQL it ran), ``<name>.collapsed`` (stacks in the folded format of
+flamegraph.pl and speedscope) and, for sampled requests, ``<name>.prof``
+for pstats. Only the newest ``PROFILING_KEEP`` captures are kept.
+``manage.py profile_summary`` lists the hot functions per view.
+
+Views that ``posts.async_views`` runs in its thread pool are profiled
+from the request thread, which only waits, so profile under WSGI.
+"""
+import cProfile
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+
+SUFFIXES = (".json", ".collapsed", ".prof")
+
+
+def _frame_name(code):
+    return (f"{code.co_name} ({os.path.basename(code.co_filename)}:"
+            f"{code.co_firstlineno})")
+
+
+def collapse(frame):
+    names = []
+    while frame is not None:
+        names.append(_frame_name(frame.f_code))
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class StackSampler(threading.Thread):
+    """Counts the stacks of the threads that are serving a request."""
+
+    def __init__(self, interval):
+        super().__init__(name="stack-sampler", daemon=True)
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.active = {}
+
+    def begin(self):
+        stacks = Counter()
+        with self.lock:
+            self.active[threading.get_ident()] = stacks
+        return stacks
+
+    def end(self):
+        with self.lock:
+            return self.active.pop(threading.get_ident(), Counter())
+
+    def run(self):
+        while True:
+            time.sleep(self.interval)
+            with self.lock:
+                if not self.active:
+                    continue
+                frames = sys._current_frames()
+                for ident, stacks in self.active.items():
+                    frame = frames.get(ident)
+                    if frame is not None:
+                        stacks[collapse(frame)] += 1
+
+
+_sampler = None
+_sampler_pid = None
+_sampler_lock = threading.Lock()
+
+
+def sampler():
+    global _sampler, _sampler_pid
+    with _sampler_lock:
+        # Threads do not survive a fork, each worker starts its own.
+        if _sampler_pid != os.getpid():
+            _sampler = StackSampler(settings.PROFILING_INTERVAL)
+            _sampler.start()
+            _sampler_pid = os.getpid()
+    return _sampler
+
+
+def rotate(directory, keep):
+    names = sorted({name.rsplit(".", 1)[0] for name in os.listdir(directory)
+                    if name.endswith(SUFFIXES)})
+    for name in names[:max(0, len(names) - keep)]:
+        for suffix in SUFFIXES:
+            try:
+                os.remove(os.path.join(directory, name + suffix))
+            except FileNotFoundError:
+                pass
+
+
+def write_capture(meta, stacks, profile=None):
+    directory = settings.PROFILING_DIR
+    os.makedirs(directory, exist_ok=True)
+    # Millisecond timestamps first, so names sort by time for rotation.
+    name = (f"{int(meta['started'] * 1000)}-{os.getpid()}-"
+            f"{threading.get_ident() % 100000}-{meta['view']}")
+    base = os.path.join(directory, name)
+    with open(base + ".collapsed", "w") as file:
+        for stack, count in stacks.most_common():
+            file.write(f"{stack} {count}\n")
+    if profile is not None:
+        profile.dump_stats(base + ".prof")
+    # The JSON is written last, readers treat it as the capture marker.
+    with open(base + ".json", "w") as file:
+        json.dump(meta, file, ensure_ascii=False)
+    rotate(directory, settings.PROFILING_KEEP)
+    return base
+
+
+def read_captures(directory):
+    """Metadata of the captures in ``directory``, oldest first."""
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith(".json"):
+            continue
+        base = os.path.join(directory, name[:-len(".json")])
+        try:
+            with open(base + ".json") as file:
+                meta = json.load(file)
+        except (OSError, ValueError):
+            continue
+        meta["base"] = base
+        yield meta
+
+
+class ProfilingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.PROFILING_ENABLED:
+            return self.get_response(request)
+        profile = None
+        if random.random() < settings.PROFILING_SAMPLE_RATE:
+            profile = cProfile.Profile()
+        stacks = sampler().begin()
+        started = time.time()
+        try:
+            if profile is not None:
+                profile.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                if profile is not None:
+                    profile.disable()
+        finally:
+            stacks = sampler().end()
+        duration = time.time() - started
+        slow = duration * 1000 >= settings.PROFILING_SLOW_MS
+        if profile is not None or slow:
+            match = request.resolver_match
+            recorder = getattr(request, "query_recorder", None)
+            write_capture({
+                "view": match.url_name if match and match.url_name
+                else "other",
+                "path": request.get_full_path(),
+                "method": request.method,
+                "status": response.status_code,
+                "started": started,
+                "duration_ms": round(duration * 1000, 3),
+                "sampled": profile is not None,
+                "slow": slow,
+                "queries": [
+                    [sql, round(elapsed * 1000, 3)]
+                    for sql, elapsed in (recorder.queries if recorder
+                                         else ())
+                ],
+            }, stacks, profile)
+        return response
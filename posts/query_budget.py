@@ -0,0 +1,80 @@
+"""Per-request SQL query accounting.
+
+``QueryBudgetMiddleware`` counts the queries of every request through
+``execute_wrapper`` on every database alias, so the reads
+``ReadReplicaRouter`` sends to the replica count too. Views declare how
+many queries they may run with ``@query_budget(n)``; going over is
+logged, or raised as ``QueryBudgetExceeded`` when ``QUERY_BUDGET_STRICT``
+is on (as in tests), so an N+1 regression fails CI instead of slowing
+production.
+"""
+import logging
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+class QueryRecorder:
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.count += 1
+            self.duration += elapsed
+            self.queries.append((sql, elapsed))
+
+
+@contextmanager
+def record_queries():
+    recorder = QueryRecorder()
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(recorder))
+        yield recorder
+
+
+def query_budget(limit):
+    def decorator(view):
+        view.query_budget = limit
+        return view
+    return decorator
+
+
+class QueryBudgetMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with record_queries() as recorder:
+            request.query_recorder = recorder
+            response = self.get_response(request)
+        budget = getattr(request, "query_budget", None)
+        if settings.DEBUG:
+            response["X-Query-Count"] = str(recorder.count)
+        if budget is not None and recorder.count > budget:
+            message = (f"{request.path} ran {recorder.count} queries, "
+                       f"budget is {budget}")
+            if getattr(settings, "QUERY_BUDGET_STRICT", False):
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        budget = getattr(view_func, "query_budget", None)
+        if budget is not None:
+            request.query_budget = budget
@@ -0,0 +1,90 @@
+"""Per-user and per-IP throttling of write views, kept in the cache.
+
+``@ratelimit("comment")`` lets each user (each IP address for anonymous
+visitors) make ``RATELIMITS["comment"]`` requests, written as
+``"<count>/<s|m|h|d>"``, in any sliding period. The cache keeps a counter
+per fixed period; the previous counter is weighted by how much of that
+period still overlaps the sliding one, so a client cannot send twice the
+limit around a period boundary. A request costs an atomic ``cache.incr``
+and a ``get`` (plus an ``add`` for the first request of a period and a
+``decr`` when it is rejected). Requests over the limit get ``429 Too Many
+Requests`` with ``Retry-After``; staff are never limited.
+
+Counters are as shared as the cache: with ``CACHE_BACKEND=locmem`` every
+worker process limits on its own. ``RATELIMIT_IP_HEADER`` is only
+trustworthy when clients cannot reach the app except through the proxy
+that sets it.
+"""
+import math
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.shortcuts import render
+
+PERIODS = {"s": 1, "m": 60, "h": 60 * 60, "d": 24 * 60 * 60}
+
+
+def parse_rate(rate):
+    count, period = rate.split("/")
+    return int(count), PERIODS[period]
+
+
+def client_key(request):
+    if request.user.is_authenticated:
+        return f"user:{request.user.pk}"
+    # Without the proxy header every anonymous client would share a bucket.
+    address = (request.META.get(settings.RATELIMIT_IP_HEADER)
+               or request.META.get("REMOTE_ADDR", ""))
+    return f"ip:{address}"
+
+
+def hit(bucket, ident, rate, now=None):
+    """Count a request, return the seconds to wait or 0 when allowed."""
+    limit, period = parse_rate(rate)
+    now = time.time() if now is None else now
+    window, elapsed = divmod(now, period)
+    key = f"ratelimit:{bucket}:{ident}:{int(window)}"
+    try:
+        count = cache.incr(key)
+    except ValueError:
+        # The counter is read again as the previous one a period later.
+        if cache.add(key, 1, 2 * period + 1):
+            count = 1
+        else:
+            count = cache.incr(key)
+    previous = cache.get(f"ratelimit:{bucket}:{ident}:{int(window) - 1}", 0)
+    if previous * (1 - elapsed / period) + count <= limit:
+        return 0
+    # Rejected requests do not count against the client.
+    cache.decr(key)
+    count -= 1
+    if count < limit:
+        # Allowed once enough of the previous period has slid out.
+        wait = period * (1 - (limit - count - 1) / previous) - elapsed
+    else:
+        # This period is full: wait for the next one to slide past it.
+        wait = (period - elapsed
+                + period * (1 - (limit - 1) / max(count, 1)))
+    return max(1, math.ceil(wait))
+
+
+def ratelimit(bucket, methods=("POST",)):
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if (settings.RATELIMIT_ENABLED
+                    and request.method in methods
+                    and not request.user.is_staff):
+                retry_after = hit(bucket, client_key(request),
+                                  settings.RATELIMITS[bucket])
+                if retry_after:
+                    response = render(request, "misc/429.html",
+                                      {"retry_after": retry_after},
+                                      status=429)
+                    response["Retry-After"] = str(retry_after)
+                    return response
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
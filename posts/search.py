@@ -0,0 +1,143 @@
+"""Full-text search over posts and comments with SQLite FTS5.
+
+Posts and comments share the ``posts_search`` virtual table: a post is
+stored under rowid ``2 * id`` and a comment under ``2 * id + 1``, so both
+can be updated in place. Signals keep the table in sync and
+``manage.py rebuild_search_index`` refills it. On other databases every
+function here is a no-op and search returns nothing.
+"""
+import base64
+import json
+import re
+
+from django.db import connection
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from posts.paginator import InvalidCursor, KeysetPaginator
+
+TABLE = "posts_search"
+MARK_START, MARK_END = "\x02", "\x03"
+ADMIN_LIMIT = 10000
+
+
+def available():
+    return connection.vendor == "sqlite"
+
+
+def to_match(query):
+    """Turn free user input into an FTS5 query of quoted prefix terms."""
+    terms = re.findall(r"\w+", query or "")
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def _execute(sql, params=()):
+    if not available():
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+def index_post(post):
+    _execute(f"INSERT OR REPLACE INTO {TABLE} "
+             "(rowid, text, post_id, comment_id) VALUES (%s, %s, %s, NULL)",
+             (post.pk * 2, post.text, post.pk))
+
+
+def index_comment(comment):
+    _execute(f"INSERT OR REPLACE INTO {TABLE} "
+             "(rowid, text, post_id, comment_id) VALUES (%s, %s, %s, %s)",
+             (comment.pk * 2 + 1, comment.text, comment.post_id, comment.pk))
+
+
+def remove_post(post_id):
+    _execute(f"DELETE FROM {TABLE} WHERE rowid = %s", (post_id * 2,))
+
+
+def remove_comment(comment_id):
+    _execute(f"DELETE FROM {TABLE} WHERE rowid = %s", (comment_id * 2 + 1,))
+
+
+def rebuild():
+    _execute(f"DELETE FROM {TABLE}")
+    _execute(f"INSERT INTO {TABLE} (rowid, text, post_id, comment_id) "
+             "SELECT id * 2, text, id, NULL FROM posts_post")
+    _execute(f"INSERT INTO {TABLE} (rowid, text, post_id, comment_id) "
+             "SELECT id * 2 + 1, text, post_id, id FROM posts_comment")
+    _execute(f"INSERT INTO {TABLE} ({TABLE}) VALUES ('optimize')")
+
+
+def matching_ids(query, comments=False, limit=ADMIN_LIMIT):
+    match = to_match(query)
+    if not match:
+        return []
+    column = "comment_id" if comments else "post_id"
+    return [row[0] for row in _execute(
+        f"SELECT {column} FROM {TABLE} WHERE {TABLE} MATCH %s "
+        "AND rowid %% 2 = %s ORDER BY rank LIMIT %s",
+        (match, int(comments), limit)
+    )]
+
+
+class SearchHit:
+    def __init__(self, rowid, score, snippet, post_id, comment_id):
+        self.rowid = rowid
+        self.score = score
+        self.post_id = post_id
+        self.comment_id = comment_id
+        self.post = None
+        self.snippet = mark_safe(
+            escape(snippet).replace(MARK_START, "<mark>")
+            .replace(MARK_END, "</mark>")
+        )
+
+    @property
+    def is_comment(self):
+        return self.comment_id is not None
+
+
+class SearchPaginator(KeysetPaginator):
+    """Keyset pages of search hits ordered by ``(bm25 score, rowid)``."""
+
+    def __init__(self, query, per_page):
+        self.match = to_match(query)
+        self.per_page = int(per_page)
+        self.count_limit = None
+
+    def encode_cursor(self, hit):
+        raw = json.dumps([hit.score, hit.rowid]).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    def decode_cursor(self, token):
+        try:
+            padded = token + "=" * (-len(token) % 4)
+            score, rowid = json.loads(base64.urlsafe_b64decode(padded))
+            return [float(score), int(rowid)]
+        except Exception as error:
+            raise InvalidCursor(token) from error
+
+    def _rows(self, values=None, direction="lt", offset=0):
+        if not self.match:
+            return []
+        # Lower bm25 scores rank higher, so "forward" means larger scores.
+        forward = direction == "lt"
+        compare, order = (">", "ASC") if forward else ("<", "DESC")
+        condition, params = "", []
+        if values is not None:
+            condition = (f"AND (rank {compare} %s OR "
+                         f"(rank = %s AND rowid {compare} %s))")
+            params = [values[0], values[0], values[1]]
+        rows = _execute(
+            f"SELECT rowid, rank, snippet({TABLE}, 0, %s, %s, '…', 16), "
+            f"post_id, comment_id FROM {TABLE} WHERE {TABLE} MATCH %s "
+            f"{condition} ORDER BY rank {order}, rowid {order} "
+            "LIMIT %s OFFSET %s",
+            [MARK_START, MARK_END, self.match, *params,
+             self.per_page + 1, offset]
+        )
+        return [SearchHit(*row) for row in rows]
+
+    @property
+    def count(self):
+        return None
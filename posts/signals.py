@@ -0,0 +1,105 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from posts import counters, images, search, timeline
+from posts.models import Comment, Follow, Group, Post
+from posts.page_cache import bump
+
+
+def _post_scopes(post, group_slug=None):
+    scopes = ["posts", f"user:{post.author.username}", f"post:{post.pk}"]
+    if post.group_id:
+        scopes.append(f"group:{post.group.slug}")
+    if group_slug:
+        scopes.append(f"group:{group_slug}")
+    return scopes
+
+
+@receiver(pre_save, sender=Post)
+def post_before_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    saved = None
+    if instance.pk is not None:
+        saved = (Post.objects.filter(pk=instance.pk)
+                 .values_list("group_id", "group__slug", "image").first())
+    (instance._saved_group_id, instance._saved_group_slug,
+     saved_image) = saved or (None, None, "")
+    instance._image_changed = ((instance.image.name or "")
+                               != (saved_image or ""))
+    if instance._image_changed:
+        instance.thumbnail = ""
+        instance.image_variants = []
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    bump(*_post_scopes(instance,
+                       getattr(instance, "_saved_group_slug", None)))
+    search.index_post(instance)
+    if getattr(instance, "_image_changed", False) and instance.image:
+        images.enqueue(instance)
+    if created:
+        timeline.fan_out(instance)
+        counters.add_to_user(instance.author_id, posts_count=1)
+        if instance.group_id:
+            counters.add_to_group(instance.group_id, posts_count=1)
+        return
+    saved_group_id = getattr(instance, "_saved_group_id", None)
+    if saved_group_id != instance.group_id:
+        if saved_group_id:
+            counters.add_to_group(saved_group_id, posts_count=-1)
+        if instance.group_id:
+            counters.add_to_group(instance.group_id, posts_count=1)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    bump(*_post_scopes(instance))
+    search.remove_post(instance.pk)
+    counters.add_to_user(instance.author_id, posts_count=-1)
+    if instance.group_id:
+        counters.add_to_group(instance.group_id, posts_count=-1)
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        bump(f"user:{instance.author.username}",
+             f"user:{instance.user.username}")
+        counters.add_to_user(instance.author_id, followers_count=1)
+        counters.add_to_user(instance.user_id, following_count=1)
+        timeline.backfill(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    bump(f"user:{instance.author.username}", f"user:{instance.user.username}")
+    counters.add_to_user(instance.author_id, followers_count=-1)
+    counters.add_to_user(instance.user_id, following_count=-1)
+    timeline.remove(instance.user_id, instance.author_id)
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        counters.add_to_post(instance.post_id, comments_count=1)
+    bump(f"post:{instance.post_id}")
+    search.index_comment(instance)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    counters.add_to_post(instance.post_id, comments_count=-1)
+    bump(f"post:{instance.post_id}")
+    search.remove_comment(instance.pk)
+
+
+@receiver(post_save, sender=Group)
+def group_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        bump(f"group:{instance.slug}")
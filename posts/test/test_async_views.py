@@ -0,0 +1,52 @@
+import asyncio
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.test import RequestFactory, TransactionTestCase
+
+from posts import async_views
+from posts.models import Post
+
+User = get_user_model()
+
+
+class AsyncViewsTest(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='StasBasov')
+        self.post = Post.objects.create(text='Асинхронный пост',
+                                        author=self.author)
+
+    def get(self, view, path, *args):
+        request = RequestFactory().get(path)
+        request.user = AnonymousUser()
+        request.session = {}
+        return asyncio.run(view(request, *args))
+
+    def test_read_views_render_in_thread_pool(self):
+        responses = [
+            self.get(async_views.index, '/'),
+            self.get(async_views.profile, '/StasBasov/', 'StasBasov'),
+            self.get(async_views.post_view, f'/StasBasov/{self.post.pk}/',
+                     'StasBasov', self.post.pk),
+        ]
+        for response in responses:
+            self.assertEqual(response.status_code, 200)
+            self.assertIn('Асинхронный пост', response.content.decode())
+
+    def test_follow_index_requires_login(self):
+        response = self.get(async_views.follow_index, '/follow/')
+        self.assertEqual(response.status_code, 302)
+
+    def test_export_streams_from_worker_thread(self):
+        request = RequestFactory().get('/StasBasov/export/')
+        request.user = self.author
+
+        async def download():
+            # Django iterates the response on the event loop, like here.
+            response = await async_views.profile_export(request,
+                                                        'StasBasov')
+            return b''.join(response.streaming_content).decode()
+
+        self.assertIn('Асинхронный пост', asyncio.run(download()))
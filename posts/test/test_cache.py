@@ -1,8 +1,14 @@
+from unittest import mock
+
 from django.contrib.auth import get_user_model
 from django.core.cache import cache
-from django.test import Client, TestCase
+from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 
+from posts import edge_cache
+from posts.models import Post
+from posts.page_cache import _page_key, bump, generations
+
 User = get_user_model()
 
 
@@ -13,16 +19,120 @@ class StaticURLTest(TestCase):
         cls.user = User.objects.create_user(username='StasBasov')
         cls.authorizer_client = Client()
         cls.authorizer_client.force_login(cls.user)
+        cls.unauthorized_client = Client()
 
-    def test_cache_after_time(self):
+    def setUp(self):
+        cache.clear()
+
+    def test_new_post_invalidates_cache(self):
         response_old = self.authorizer_client.get(reverse('index'))
-        StaticURLTest.authorizer_client.post(
-            reverse('new_post'),
-            {'text': 'Это текст публикации'},
-            follow=True
-        )
+        response_cached = self.authorizer_client.get(reverse('index'))
+        self.assertEqual(response_cached['X-Page-Cache'], 'hit')
+        self.assertEqual(response_old.content, response_cached.content)
+        with self.captureOnCommitCallbacks(execute=True):
+            StaticURLTest.authorizer_client.post(
+                reverse('new_post'),
+                {'text': 'Это текст публикации'},
+                follow=True
+            )
         response_new = self.authorizer_client.get(reverse('index'))
-        self.assertEqual(response_old.content, response_new.content)
-        cache.clear()
-        response_newest = self.authorizer_client.get(reverse('index'))
-        self.assertNotEqual(response_old.content, response_newest.content)
+        self.assertContains(response_new, 'Это текст публикации')
+        profile = self.unauthorized_client.get(
+            reverse('profile', args=[self.user.username])
+        )
+        self.assertContains(profile, 'Это текст публикации')
+
+    def test_cache_hit_skips_database(self):
+        self.unauthorized_client.get(reverse('index'))
+        with self.assertNumQueries(0):
+            self.unauthorized_client.get(reverse('index'))
+
+    def test_pages_are_cached_per_user(self):
+        self.authorizer_client.post(reverse('new_post'),
+                                    {'text': 'Это текст публикации'})
+        self.authorizer_client.get(reverse('index'))
+        response = self.unauthorized_client.get(reverse('index'))
+        self.assertNotContains(response, 'Редактировать')
+
+    def test_stale_page_while_rebuilding(self):
+        response_old = self.unauthorized_client.get(reverse('index'))
+        request = response_old.wsgi_request
+        cache.add(f'{_page_key(request, "index")}:lock', 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            bump('posts')
+        response = self.unauthorized_client.get(reverse('index'))
+        self.assertEqual(response['X-Page-Cache'], 'stale')
+        self.assertEqual(response.content, response_old.content)
+        self.assertFalse(response.has_header('ETag'))
+
+    def test_bump_waits_for_commit(self):
+        before = generations(['posts'])
+        with self.captureOnCommitCallbacks(execute=True):
+            bump('posts')
+            # Readers must not cache pre-commit rows as the new generation.
+            self.assertEqual(generations(['posts']), before)
+        self.assertNotEqual(generations(['posts']), before)
+
+    def test_conditional_get(self):
+        url = reverse('profile', args=[self.user.username])
+        response = self.unauthorized_client.get(url)
+        etag = response['ETag']
+        self.assertIn('Cookie', response['Vary'])
+        with self.assertNumQueries(0):
+            response = self.unauthorized_client.get(
+                url, HTTP_IF_NONE_MATCH=etag
+            )
+        self.assertEqual(response.status_code, 304)
+        response = self.unauthorized_client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+        )
+        self.assertEqual(response.status_code, 304)
+
+        other = self.authorizer_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(other.status_code, 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.authorizer_client.post(reverse('new_post'),
+                                        {'text': 'Это текст публикации'})
+        response = self.unauthorized_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Это текст публикации')
+
+    def test_new_comment_changes_post_etag(self):
+        self.authorizer_client.post(reverse('new_post'),
+                                    {'text': 'Это текст публикации'})
+        post = self.user.posts.get()
+        url = reverse('post', args=[self.user.username, post.pk])
+        etag = self.unauthorized_client.get(url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.authorizer_client.post(
+                reverse('add_comment', args=[self.user.username, post.pk]),
+                {'text': 'Комментарий'}
+            )
+        response = self.unauthorized_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_edge_cache_headers(self):
+        url = reverse('profile', args=[self.user.username])
+        response = self.unauthorized_client.get(url)
+        self.assertIn('public', response['Cache-Control'])
+        self.assertEqual(response['X-Accel-Expires'], '10')
+        self.assertEqual(response['Surrogate-Key'], 'user:StasBasov')
+        response = self.authorizer_client.get(url)
+        self.assertIn('private', response['Cache-Control'])
+        self.assertFalse(response.has_header('X-Accel-Expires'))
+
+    @override_settings(EDGE_CACHE_URL='http://nginx:8080')
+    def test_writes_refresh_edge_cache(self):
+        # Refresh in this thread, which sees the test transaction.
+        inline = mock.Mock(submit=lambda function, *args: function(*args))
+        with mock.patch.object(edge_cache, '_executor', inline), \
+                mock.patch.object(edge_cache, 'close_old_connections'), \
+                mock.patch.object(edge_cache.urllib.request,
+                                  'urlopen') as urlopen:
+            with self.captureOnCommitCallbacks(execute=True):
+                post = Post.objects.create(text='Текст', author=self.user)
+        self.assertEqual(
+            [call.args[0].full_url for call in urlopen.call_args_list],
+            ['http://nginx:8080/', 'http://nginx:8080/StasBasov/',
+             f'http://nginx:8080/StasBasov/{post.pk}/']
+        )
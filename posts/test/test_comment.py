@@ -34,3 +34,45 @@ class StaticURLTest(TestCase):
         except Comment.DoesNotExist:
             commit = None
         self.assertEqual(commit, None)
+
+
+class CommentPaginationTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='StasBasov')
+        cls.post = Post.objects.create(text='Вирусный пост', author=cls.user)
+        Comment.objects.bulk_create(
+            Comment(post=cls.post, author=cls.user, text=f'Комментарий {i}')
+            for i in range(30)
+        )
+        cls.post.refresh_from_db()
+        cls.unauthorized_client = Client()
+
+    def test_post_page_shows_first_comments(self):
+        newest = Comment.objects.order_by('-created', '-id')
+        response = self.unauthorized_client.get(
+            reverse('post', args=[self.user.username, self.post.pk])
+        )
+        self.assertEqual(len(response.context['comments']), 20)
+        self.assertEqual(list(response.context['comments']),
+                         list(newest[:20]))
+        self.assertContains(response, 'Показать ещё')
+
+    def test_fragment_returns_next_comments(self):
+        response = self.unauthorized_client.get(
+            reverse('post', args=[self.user.username, self.post.pk])
+        )
+        cursor = response.context['comments'].next_cursor()
+        url = reverse('post_comments', args=[self.user.username,
+                                             self.post.pk])
+        response = self.unauthorized_client.get(url, {'after': cursor})
+        self.assertEqual(len(response.context['comments']), 10)
+        self.assertNotContains(response, 'Показать ещё')
+        self.assertNotContains(response, '<html>')
+
+        data = self.unauthorized_client.get(
+            url, {'after': cursor, 'format': 'json'}
+        ).json()
+        self.assertEqual(len(data['comments']), 10)
+        self.assertIsNone(data['next'])
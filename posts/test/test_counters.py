@@ -0,0 +1,82 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import (Comment, Follow, Group, GroupStats, Post,
+                          UserStats)
+
+User = get_user_model()
+
+
+class CountersTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='StasBasov')
+        cls.author = User.objects.create_user(username='ProstoStas')
+        cls.group = Group.objects.create(title='test', description='test',
+                                         slug='test')
+        cls.other_group = Group.objects.create(title='other',
+                                               description='other',
+                                               slug='other')
+        cls.unauthorized_client = Client()
+
+    def stats(self, user):
+        return UserStats.objects.get(user=user)
+
+    def test_post_counters(self):
+        post = Post.objects.create(text='Пост', author=self.author,
+                                   group=self.group)
+        self.assertEqual(self.stats(self.author).posts_count, 1)
+        self.assertEqual(GroupStats.objects.get(group=self.group).posts_count,
+                         1)
+        post.group = self.other_group
+        post.save()
+        self.assertEqual(GroupStats.objects.get(group=self.group).posts_count,
+                         0)
+        self.assertEqual(
+            GroupStats.objects.get(group=self.other_group).posts_count, 1
+        )
+        post.delete()
+        self.assertEqual(self.stats(self.author).posts_count, 0)
+
+    def test_follow_counters(self):
+        Follow.objects.create(user=self.user, author=self.author)
+        self.assertEqual(self.stats(self.author).followers_count, 1)
+        self.assertEqual(self.stats(self.user).following_count, 1)
+        response = self.unauthorized_client.get(
+            reverse('profile', args=[self.author.username])
+        )
+        self.assertContains(response, 'Подписчиков: 1')
+        Follow.objects.all().delete()
+        self.assertEqual(self.stats(self.author).followers_count, 0)
+
+    def test_recount_repairs_drift(self):
+        Post.objects.create(text='Пост', author=self.author)
+        UserStats.objects.filter(user=self.author).update(posts_count=7)
+        call_command('recount', stdout=StringIO())
+        self.assertEqual(self.stats(self.author).posts_count, 1)
+
+    def test_comment_counter(self):
+        post = Post.objects.create(text='Пост', author=self.author)
+        comment = Comment.objects.create(post=post, author=self.user,
+                                         text='Комментарий')
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+        comment.delete()
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 0)
+        Post.objects.filter(pk=post.pk).update(comments_count=5)
+        call_command('recount', stdout=StringIO())
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 0)
+
+    def test_groups_index_counts(self):
+        Post.objects.create(text='Пост', author=self.author,
+                            group=self.group)
+        with self.assertNumQueries(2):
+            response = self.unauthorized_client.get(reverse('groups_index'))
+        self.assertContains(response, 'Количество постов: 1')
@@ -0,0 +1,49 @@
+import os
+import tempfile
+
+from django.test import SimpleTestCase
+
+from yatube.routers import ReadReplicaRouter
+from yatube.sqlite.base import DatabaseWrapper
+
+
+class ProductionDatabaseTest(SimpleTestCase):
+    databases = {"default"}
+
+    def connect(self, path, **settings):
+        wrapper = DatabaseWrapper({
+            "ENGINE": "yatube.sqlite", "NAME": path, "USER": "",
+            "PASSWORD": "", "HOST": "", "PORT": "", "OPTIONS": {},
+            "TIME_ZONE": None, "CONN_MAX_AGE": 600, "AUTOCOMMIT": True,
+            "ATOMIC_REQUESTS": False, **settings,
+        })
+        self.addCleanup(wrapper.close)
+        return wrapper
+
+    def pragma(self, wrapper, name):
+        with wrapper.cursor() as cursor:
+            cursor.execute(f"PRAGMA {name}")
+            return cursor.fetchone()[0]
+
+    def test_pragmas_are_set_on_connect(self):
+        path = os.path.join(tempfile.mkdtemp(), "db.sqlite3")
+        primary = self.connect(path)
+        self.assertEqual(self.pragma(primary, "journal_mode"), "wal")
+        self.assertEqual(self.pragma(primary, "busy_timeout"), 5000)
+        replica = self.connect(path, PRAGMAS={"query_only": "ON"})
+        self.assertEqual(self.pragma(replica, "query_only"), 1)
+        self.assertTrue(primary.is_usable())
+
+    def test_health_check_drops_broken_connection(self):
+        wrapper = self.connect(os.path.join(tempfile.mkdtemp(), "db.sqlite3"),
+                               CONN_HEALTH_CHECKS=True)
+        wrapper.ensure_connection()
+        wrapper.connection.close()
+        wrapper.close_if_unusable_or_obsolete()
+        self.assertIsNone(wrapper.connection)
+
+    def test_router_reads_from_replica(self):
+        router = ReadReplicaRouter()
+        self.assertEqual(router.db_for_read(None), "replica")
+        self.assertEqual(router.db_for_write(None), "default")
+        self.assertFalse(router.allow_migrate("replica", "posts"))
@@ -0,0 +1,87 @@
+import csv
+import io
+import json
+import shutil
+import tempfile
+import zipfile
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts import exports
+from posts.models import Comment, Post
+
+User = get_user_model()
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class ExportTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='StasBasov')
+        cls.reader = User.objects.create_user(username='ProstoStas')
+        cls.posts = [Post.objects.create(text=f'Пост {number}',
+                                         author=cls.author)
+                     for number in range(3)]
+        Comment.objects.create(post=cls.posts[0], author=cls.author,
+                               text='Свой коммент')
+        Comment.objects.create(post=cls.posts[0], author=cls.reader,
+                               text='Чужой коммент')
+        cls.authorized_client = Client()
+        cls.authorized_client.force_login(cls.author)
+        cls.reader_client = Client()
+        cls.reader_client.force_login(cls.reader)
+        cls.url = reverse('profile_export', args=[cls.author.username])
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def download(self, export_format):
+        response = self.authorized_client.get(self.url,
+                                              {'format': export_format})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content)
+
+    def test_only_author_can_export(self):
+        response = self.reader_client.get(self.url)
+        self.assertRedirects(response, reverse('profile',
+                                               args=['StasBasov']))
+        response = Client().get(self.url)
+        self.assertEqual(response.status_code, 302)
+        response = self.authorized_client.get(self.url, {'format': 'xml'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_jsonl_and_csv(self):
+        rows = [json.loads(line) for line
+                in self.download('jsonl').decode().splitlines()]
+        self.assertEqual([row['type'] for row in rows],
+                         ['post', 'post', 'post', 'comment'])
+        self.assertEqual(rows[-1]['text'], 'Свой коммент')
+        table = list(csv.reader(io.StringIO(self.download('csv').decode())))
+        self.assertEqual(tuple(table[0]), exports.CSV_COLUMNS)
+        self.assertEqual(len(table), 5)
+
+    def test_zip_with_images(self):
+        post = self.posts[1]
+        post.image.save('photo.jpg', ContentFile(b'jpeg'))
+        archive = zipfile.ZipFile(io.BytesIO(self.download('zip')))
+        self.assertIsNone(archive.testzip())
+        self.assertEqual(archive.read(f'images/{post.image.name}'), b'jpeg')
+        posts = archive.read('posts.jsonl').decode().splitlines()
+        self.assertEqual(len(posts), 3)
+
+    def test_rows_are_read_in_chunks(self):
+        exports.CHUNK_SIZE = 2
+        self.addCleanup(setattr, exports, 'CHUNK_SIZE', 2000)
+        chunks = exports.post_rows(self.author)
+        with self.assertNumQueries(1):
+            next(chunks)
+        self.assertEqual(len(list(chunks)), 2)
@@ -0,0 +1,43 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.fragments import attach_fragments
+from posts.models import Post
+
+User = get_user_model()
+
+
+class FragmentCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='StasBasov')
+        cls.post = Post.objects.create(text='Текст', author=cls.user)
+        cls.authorizer_client = Client()
+        cls.authorizer_client.force_login(cls.user)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_fragments_are_reused(self):
+        posts = attach_fragments(Post.objects.select_related('author'),
+                                 'includes/post_card_body.html')
+        self.assertIn('Текст', posts[0].fragment)
+        with self.assertNumQueries(1):
+            posts = attach_fragments(Post.objects.all(),
+                                     'includes/post_card_body.html')
+        self.assertIn('Текст', posts[0].fragment)
+
+    def test_edit_renders_new_fragment(self):
+        self.authorizer_client.get(reverse('index'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.authorizer_client.post(
+                reverse('post_edit', args=[self.user.username,
+                                           self.post.pk]),
+                {'text': 'Новый текст'}
+            )
+        response = self.authorizer_client.get(reverse('index'))
+        self.assertContains(response, 'Новый текст')
+        self.assertContains(response, 'Редактировать')
@@ -0,0 +1,94 @@
+import json
+import os
+import shutil
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connections
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts import metrics
+from posts.models import Post
+
+User = get_user_model()
+
+
+class MetricsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='StasBasov')
+        Post.objects.create(text='Пост', author=cls.author)
+        cls.unauthorized_client = Client()
+
+    def setUp(self):
+        cache.clear()
+        # Start every test from empty histograms.
+        metrics._state['pid'] = None
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+
+    def test_server_timing(self):
+        response = self.unauthorized_client.get(reverse('index'))
+        timing = response['Server-Timing']
+        self.assertIn('queries"', timing)
+        # The page and the post card fragment.
+        self.assertIn('cache;desc="0 hits, 2 misses"', timing)
+        self.assertIn('tpl;dur=', timing)
+        response = self.unauthorized_client.get(reverse('index'))
+        self.assertIn('cache;desc="1 hits, 0 misses"',
+                      response['Server-Timing'])
+
+    def test_queries_of_every_alias_are_counted(self):
+        # A second alias, as DATABASE_REPLICA adds for the router.
+        connections.databases['replica'] = {
+            **connections['default'].settings_dict
+        }
+        self.addCleanup(connections.databases.pop, 'replica')
+        self.addCleanup(lambda: connections['replica'].close())
+        request_metrics = metrics.RequestMetrics()
+        token = metrics._current.set(request_metrics)
+        self.addCleanup(metrics._current.reset, token)
+        with metrics.track_queries():
+            with connections['replica'].cursor() as cursor:
+                cursor.execute('SELECT 1')
+        self.assertEqual(request_metrics.queries, 1)
+
+    def test_histograms_per_view(self):
+        self.unauthorized_client.get(reverse('index'))
+        self.unauthorized_client.get(reverse('profile', args=['StasBasov']))
+        response = self.unauthorized_client.get(reverse('metrics'))
+        self.assertEqual(response['Content-Type'], metrics.CONTENT_TYPE)
+        text = response.content.decode()
+        self.assertIn('yatube_request_duration_seconds_count{view="index"} 1',
+                      text)
+        self.assertIn('yatube_requests_total{view="profile",status="200"} 1',
+                      text)
+        self.assertIn('yatube_request_duration_seconds_bucket'
+                      '{view="index",le="+Inf"} 1', text)
+
+    def test_workers_are_added_up(self):
+        with override_settings(METRICS_DIR=self.directory,
+                               METRICS_FLUSH_INTERVAL=0):
+            self.unauthorized_client.get(reverse('index'))
+            own = os.path.join(self.directory, f'{os.getpid()}.json')
+            self.assertTrue(os.path.exists(own))
+            with open(own) as file:
+                saved = json.load(file)
+            with open(os.path.join(self.directory, '1.json'), 'w') as file:
+                json.dump(saved, file)
+            text = metrics.render(metrics.collect())
+        self.assertIn('yatube_requests_total{view="index",status="200"} 2',
+                      text)
+
+    def test_restarted_worker_keeps_counting(self):
+        with override_settings(METRICS_DIR=self.directory,
+                               METRICS_FLUSH_INTERVAL=0):
+            self.unauthorized_client.get(reverse('index'))
+            metrics._state['pid'] = None
+            self.unauthorized_client.get(reverse('index'))
+            text = metrics.render(metrics.collect())
+        self.assertIn('yatube_requests_total{view="index",status="200"} 2',
+                      text)
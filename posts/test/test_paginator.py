@@ -0,0 +1,57 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Post
+from posts.paginator import KeysetPaginator
+
+User = get_user_model()
+
+
+class KeysetPaginatorTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='StasBasov')
+        cls.posts = [Post.objects.create(text=f'Пост {i}', author=cls.user)
+                     for i in range(12)]
+        cls.unauthorized_client = Client()
+
+    def setUp(self):
+        cache.clear()
+
+    def test_walk_forward_and_back(self):
+        paginator = KeysetPaginator(Post.objects.all(), 5)
+        first = paginator.get_page({})
+        second = paginator.get_page({'after': first.next_cursor()})
+        third = paginator.get_page({'after': second.next_cursor()})
+        self.assertEqual(len(third), 2)
+        self.assertFalse(third.has_next())
+        back = paginator.get_page({'before': third.previous_cursor()})
+        self.assertEqual(list(back), list(second))
+        self.assertEqual(
+            [post.pk for post in list(first) + list(second) + list(third)],
+            [post.pk for post in reversed(self.posts)]
+        )
+
+    def test_old_page_numbers(self):
+        paginator = KeysetPaginator(Post.objects.all(), 5)
+        page = paginator.get_page({'page': '2'})
+        self.assertEqual(page[0], self.posts[6])
+        self.assertTrue(page.has_previous())
+        response = self.unauthorized_client.get(reverse('index'),
+                                                {'page': 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context['page']), list(page))
+
+    def test_invalid_cursor(self):
+        response = self.unauthorized_client.get(reverse('index'),
+                                                {'after': 'garbage'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['page'][0], self.posts[-1])
+
+    def test_capped_count(self):
+        paginator = KeysetPaginator(Post.objects.all(), 5, count_limit=10)
+        self.assertEqual(paginator.count, 10)
+        self.assertTrue(paginator.count_is_capped)
@@ -0,0 +1,73 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post
+
+User = get_user_model()
+
+PROFILING_DIR = tempfile.mkdtemp()
+
+
+@override_settings(PROFILING_ENABLED=True, PROFILING_DIR=PROFILING_DIR,
+                   PROFILING_SAMPLE_RATE=0, PROFILING_SLOW_MS=10 ** 6)
+class ProfilingTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='StasBasov')
+        Post.objects.create(text='Пост', author=cls.author)
+        cls.unauthorized_client = Client()
+
+    def setUp(self):
+        cache.clear()
+        shutil.rmtree(PROFILING_DIR, ignore_errors=True)
+        self.addCleanup(shutil.rmtree, PROFILING_DIR, ignore_errors=True)
+
+    def captures(self):
+        if not os.path.isdir(PROFILING_DIR):
+            return []
+        return sorted(name for name in os.listdir(PROFILING_DIR)
+                      if name.endswith('.json'))
+
+    def test_fast_requests_are_not_kept(self):
+        self.unauthorized_client.get(reverse('index'))
+        self.assertEqual(self.captures(), [])
+
+    @override_settings(PROFILING_SAMPLE_RATE=1)
+    def test_sampled_request_is_profiled(self):
+        self.unauthorized_client.get(reverse('index'))
+        [name] = self.captures()
+        base = os.path.join(PROFILING_DIR, name[:-len('.json')])
+        with open(base + '.json') as file:
+            meta = json.load(file)
+        self.assertEqual(meta['view'], 'index')
+        self.assertTrue(meta['sampled'])
+        self.assertTrue(any('posts_post' in sql
+                            for sql, elapsed in meta['queries']))
+        self.assertTrue(os.path.exists(base + '.prof'))
+        output = StringIO()
+        call_command('profile_summary', dir=PROFILING_DIR, stdout=output)
+        self.assertIn('index: 1 captures', output.getvalue())
+        self.assertIn('cProfile of 1 sampled requests', output.getvalue())
+
+    @override_settings(PROFILING_SLOW_MS=0, PROFILING_KEEP=2)
+    def test_slow_requests_are_kept_and_rotated(self):
+        for _ in range(3):
+            cache.clear()
+            self.unauthorized_client.get(reverse('index'))
+        names = self.captures()
+        self.assertEqual(len(names), 2)
+        base = os.path.join(PROFILING_DIR, names[0][:-len('.json')])
+        with open(base + '.json') as file:
+            self.assertTrue(json.load(file)['slow'])
+        self.assertFalse(os.path.exists(base + '.prof'))
+        self.assertTrue(os.path.exists(base + '.collapsed'))
@@ -0,0 +1,113 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connections
+from django.test import (Client, TestCase, TransactionTestCase,
+                         override_settings)
+from django.urls import reverse
+
+from posts import views
+from posts.models import Comment, Follow, Group, Post
+from posts.query_budget import QueryBudgetExceeded, record_queries
+
+User = get_user_model()
+
+
+@override_settings(QUERY_BUDGET_STRICT=True)
+class QueryBudgetTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='StasBasov')
+        cls.reader = User.objects.create_user(username='ProstoStas')
+        cls.group = Group.objects.create(title='test', description='test',
+                                         slug='test')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        cls.authorizer_client = Client()
+        cls.authorizer_client.force_login(cls.reader)
+
+    def add_posts(self, number):
+        for i in range(number):
+            post = Post.objects.create(text=f'Пост {i}', author=self.author,
+                                       group=self.group)
+            Comment.objects.bulk_create(
+                Comment(post=post, author=self.reader, text='Комментарий')
+                for _ in range(number)
+            )
+        return post
+
+    def urls(self, post):
+        return [
+            reverse('index'),
+            reverse('groups_index'),
+            reverse('group_posts', args=[self.group.slug]),
+            reverse('profile', args=[self.author.username]),
+            reverse('post', args=[self.author.username, post.pk]),
+            reverse('follow_index'),
+        ]
+
+    def count_queries(self, url):
+        cache.clear()
+        with record_queries() as recorder:
+            response = self.authorizer_client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return recorder.count
+
+    def test_query_count_does_not_grow_with_page_size(self):
+        post = self.add_posts(1)
+        small = [self.count_queries(url) for url in self.urls(post)]
+        post = self.add_posts(5)
+        large = [self.count_queries(url) for url in self.urls(post)]
+        self.assertEqual(large, small)
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=0)
+    def test_follow_page_with_pulled_author_fits_budget(self):
+        self.add_posts(1)
+        url = reverse('follow_index')
+        # The first request also loads the cached list of pulled authors.
+        self.assertEqual(self.count_queries(url), 6)
+        with record_queries() as recorder:
+            self.authorizer_client.get(url)
+        self.assertEqual(recorder.count, 5)
+
+
+@override_settings(QUERY_BUDGET_STRICT=True,
+                   DATABASE_ROUTERS=['yatube.routers.ReadReplicaRouter'])
+class ReplicaQueryBudgetTest(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        # A second alias to the test database, as DATABASE_REPLICA adds.
+        connections.databases['replica'] = {
+            **connections['default'].settings_dict
+        }
+        self.addCleanup(connections.databases.pop, 'replica')
+        self.addCleanup(lambda: connections['replica'].close())
+        author = User.objects.create_user(username='StasBasov')
+        Post.objects.create(text='Пост', author=author)
+
+    def test_replica_reads_count_against_budget(self):
+        with record_queries() as recorder:
+            self.assertEqual(Post.objects.count(), 1)
+        self.assertEqual(recorder.count, 1)
+        with mock.patch.object(views.index, 'query_budget', 0):
+            with self.assertRaises(QueryBudgetExceeded):
+                Client().get(reverse('index'))
+
+
+class QueryPlanAuditTest(TestCase):
+    def test_view_queries_use_indexes(self):
+        author = User.objects.create_user(username='StasBasov')
+        reader = User.objects.create_user(username='ProstoStas')
+        group = Group.objects.create(title='test', description='test',
+                                     slug='test')
+        Follow.objects.create(user=reader, author=author)
+        for i in range(10):
+            post = Post.objects.create(text=f'Пост {i}', author=author,
+                                       group=group)
+            Comment.objects.create(post=post, author=reader, text='кот')
+        output = StringIO()
+        call_command('audit_query_plans', stdout=output)
+        self.assertIn('no regressions', output.getvalue())
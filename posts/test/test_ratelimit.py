@@ -0,0 +1,95 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts import ratelimit
+from posts.models import Comment, Post
+
+User = get_user_model()
+
+LIMITS = {'post': '2/m', 'comment': '2/m', 'follow': '2/m',
+          'signup': '1/h'}
+
+
+@override_settings(RATELIMITS=LIMITS)
+class RateLimitTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='StasBasov')
+        cls.admin = User.objects.create_user(username='Admin',
+                                             is_staff=True)
+        cls.post = Post.objects.create(text='Пост', author=cls.user)
+        cls.authorized_client = Client()
+        cls.authorized_client.force_login(cls.user)
+        cls.admin_client = Client()
+        cls.admin_client.force_login(cls.admin)
+        cls.comment_url = reverse('add_comment',
+                                  args=['StasBasov', cls.post.pk])
+
+    def setUp(self):
+        cache.clear()
+
+    def test_window_slides(self):
+        self.assertEqual(ratelimit.hit('test', 'ip:1', '2/m', now=600), 0)
+        self.assertEqual(ratelimit.hit('test', 'ip:1', '2/m', now=610), 0)
+        self.assertEqual(ratelimit.hit('test', 'ip:1', '2/m', now=615), 75)
+        self.assertEqual(ratelimit.hit('test', 'ip:2', '2/m', now=615), 0)
+        # Half of the previous period still counts at 690.
+        self.assertEqual(ratelimit.hit('test', 'ip:1', '2/m', now=689), 1)
+        self.assertEqual(ratelimit.hit('test', 'ip:1', '2/m', now=690), 0)
+
+    def test_no_burst_at_period_boundary(self):
+        for now in (659, 659.5):
+            self.assertEqual(
+                ratelimit.hit('test', 'ip:1', '2/m', now=now), 0
+            )
+        for now in (660, 660.5):
+            self.assertGreater(
+                ratelimit.hit('test', 'ip:1', '2/m', now=now), 0
+            )
+
+    def test_comments_over_limit_get_429(self):
+        for _ in range(2):
+            response = self.authorized_client.post(self.comment_url,
+                                                   {'text': 'Коммент'})
+            self.assertEqual(response.status_code, 302)
+        response = self.authorized_client.post(self.comment_url,
+                                               {'text': 'Коммент'})
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response['Retry-After']), 0)
+        self.assertEqual(Comment.objects.count(), 2)
+        # Reading is never limited.
+        response = self.authorized_client.get(reverse('new_post'))
+        self.assertEqual(response.status_code, 200)
+
+    def test_staff_are_exempt(self):
+        for _ in range(3):
+            response = self.admin_client.post(self.comment_url,
+                                              {'text': 'Коммент'})
+            self.assertEqual(response.status_code, 302)
+
+    def test_anonymous_signup_is_limited_per_ip(self):
+        data = {'username': 'new', 'password1': 'x', 'password2': 'y'}
+        response = Client().post(reverse('signup'), data,
+                                 REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(response.status_code, 200)
+        response = Client().post(reverse('signup'), data,
+                                 REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(response.status_code, 429)
+        response = Client().post(reverse('signup'), data,
+                                 REMOTE_ADDR='10.0.0.2')
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(RATELIMIT_IP_HEADER='HTTP_X_REAL_IP')
+    def test_missing_ip_header_falls_back_to_remote_addr(self):
+        data = {'username': 'new', 'password1': 'x', 'password2': 'y'}
+        for address in ('10.0.0.1', '10.0.0.2'):
+            response = Client().post(reverse('signup'), data,
+                                     REMOTE_ADDR=address)
+            self.assertEqual(response.status_code, 200)
+        response = Client().post(reverse('signup'), data,
+                                 REMOTE_ADDR='10.0.0.3',
+                                 HTTP_X_REAL_IP='10.0.0.1')
+        self.assertEqual(response.status_code, 429)
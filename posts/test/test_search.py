@@ -0,0 +1,66 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import search
+from posts.models import Comment, Post
+
+User = get_user_model()
+
+
+class SearchTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='StasBasov')
+        cls.admin = User.objects.create_superuser(username='admin',
+                                                  password='admin')
+        cls.unauthorized_client = Client()
+
+    def results(self, query, **params):
+        response = self.unauthorized_client.get(reverse('search'),
+                                                {'q': query, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.context['page']
+
+    def test_posts_and_comments_are_found(self):
+        post = Post.objects.create(text='Котики <b>правят</b> миром',
+                                   author=self.user)
+        Comment.objects.create(post=post, author=self.user,
+                               text='Согласен, котики')
+        Post.objects.create(text='Собаки тоже ничего', author=self.user)
+        page = self.results('котик')
+        self.assertEqual(len(page), 2)
+        self.assertEqual({hit.post for hit in page}, {post})
+        snippets = ''.join(hit.snippet for hit in page)
+        self.assertIn('<mark>Котики</mark>', snippets)
+        self.assertNotIn('<b>', snippets)
+
+    def test_index_follows_edits_and_deletes(self):
+        post = Post.objects.create(text='Старый текст', author=self.user)
+        post.text = 'Новый текст'
+        post.save()
+        self.assertEqual(len(self.results('старый')), 0)
+        self.assertEqual(len(self.results('новый')), 1)
+        post.delete()
+        self.assertEqual(len(self.results('новый')), 0)
+
+    def test_keyset_pages(self):
+        for i in range(15):
+            Post.objects.create(text=f'пост номер {i}', author=self.user)
+        first = self.results('пост')
+        second = self.results('пост', after=first.next_cursor())
+        self.assertEqual(len(first), 10)
+        self.assertEqual(len(second), 5)
+        self.assertFalse({hit.rowid for hit in first}
+                         & {hit.rowid for hit in second})
+
+    def test_rebuild_and_admin_search(self):
+        Post.objects.create(text='Иголка в стоге', author=self.user)
+        search.rebuild()
+        self.assertEqual(len(search.matching_ids('иголка')), 1)
+        client = Client()
+        client.force_login(self.admin)
+        response = client.get('/admin/posts/post/', {'q': 'иголка'})
+        self.assertContains(response, 'Иголка в стоге')
+        self.assertEqual(len(self.results('"; DROP TABLE')), 0)
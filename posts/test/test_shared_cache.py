@@ -0,0 +1,51 @@
+import multiprocessing
+import os
+import tempfile
+
+from django.test import SimpleTestCase
+
+from yatube.cache_backends import SharedMemoryCache
+
+
+def _set_in_child(location):
+    SharedMemoryCache(location, {}).set('from_child', [1, 2, 3])
+
+
+class SharedMemoryCacheTest(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.location = os.path.join(directory, 'cache.sqlite3')
+        self.cache = SharedMemoryCache(
+            self.location,
+            {'OPTIONS': {'MAX_ENTRIES': 10, 'CULL_EVERY': 1}}
+        )
+
+    def test_get_set_add_incr(self):
+        self.cache.set('key', {'a': 1})
+        self.assertEqual(self.cache.get('key'), {'a': 1})
+        self.assertFalse(self.cache.add('key', 'other'))
+        self.assertTrue(self.cache.add('counter', 1))
+        self.assertEqual(self.cache.incr('counter', 5), 6)
+        self.assertEqual(self.cache.get_many(['key', 'counter', 'none']),
+                         {'key': {'a': 1}, 'counter': 6})
+        with self.assertRaises(ValueError):
+            self.cache.incr('none')
+
+    def test_expired_entries(self):
+        self.cache.set('key', 'value', timeout=-1)
+        self.assertIsNone(self.cache.get('key'))
+        self.assertTrue(self.cache.add('key', 'fresh'))
+        self.assertEqual(self.cache.get('key'), 'fresh')
+
+    def test_lru_eviction(self):
+        for number in range(20):
+            self.cache.set(f'key{number}', number)
+        self.assertIsNone(self.cache.get('key0'))
+        self.assertEqual(self.cache.get('key19'), 19)
+
+    def test_visible_across_processes(self):
+        process = multiprocessing.Process(target=_set_in_child,
+                                          args=(self.location,))
+        process.start()
+        process.join()
+        self.assertEqual(self.cache.get('from_child'), [1, 2, 3])
@@ -0,0 +1,56 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.templatetags.static import static
+from django.test import Client, TestCase, override_settings
+
+SOURCE = tempfile.mkdtemp()
+STATIC_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(
+    STATICFILES_DIRS=[SOURCE], STATIC_ROOT=STATIC_ROOT,
+    STATICFILES_FINDERS=[
+        'django.contrib.staticfiles.finders.FileSystemFinder'
+    ],
+)
+class StaticFilesTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        os.makedirs(os.path.join(SOURCE, 'css'), exist_ok=True)
+        with open(os.path.join(SOURCE, 'css', 'site.css'), 'w') as file:
+            file.write('body { background: url("../logo.png"); }\n' * 100)
+        with open(os.path.join(SOURCE, 'logo.png'), 'wb') as file:
+            file.write(b'\x89PNG')
+        call_command('collectstatic', interactive=False, verbosity=0,
+                     stdout=StringIO())
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(SOURCE, ignore_errors=True)
+        shutil.rmtree(STATIC_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def test_hashed_and_precompressed(self):
+        url = static('css/site.css')
+        self.assertRegex(url, r'^/static/css/site\.[0-9a-f]{12}\.css$')
+        path = os.path.join(STATIC_ROOT, url[len('/static/'):])
+        for suffix in ('', '.gz', '.br'):
+            self.assertTrue(os.path.exists(path + suffix))
+        with open(path) as file:
+            self.assertRegex(file.read(), r'logo\.[0-9a-f]{12}\.png')
+
+    def test_hashed_files_are_immutable(self):
+        response = Client().get(static('css/site.css'),
+                                HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertIn('immutable', response['Cache-Control'])
+        response.close()
+
+    def test_missing_files_keep_their_name(self):
+        self.assertEqual(static('bootstrap/dist/css/bootstrap.min.css'),
+                         '/static/bootstrap/dist/css/bootstrap.min.css')
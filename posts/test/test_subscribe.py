@@ -57,3 +57,15 @@ class StaticURLTest(TestCase):
                                               follow=True)
         response = response.context['page'][0].text
         self.assertEqual(response, post_check.text)
+
+    def test_follow_button_reflects_subscription(self):
+        url = reverse('profile', kwargs={'username': self.user2})
+        response = self.authorizer_client.get(url)
+        self.assertContains(response, 'Подписаться')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.authorizer_client.get(
+                reverse('profile_follow', kwargs={'username': self.user2})
+            )
+        response = self.authorizer_client.get(url)
+        self.assertContains(response, 'Отписаться')
+        self.assertTrue(response.context['is_following'])
@@ -0,0 +1,142 @@
+import io
+import shutil
+import tempfile
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from posts.models import Post, ThumbnailJob
+
+User = get_user_model()
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def make_image(name="photo.jpg", color=(200, 30, 30)):
+    buffer = io.BytesIO()
+    Image.new("RGB", (1200, 800), color).save(buffer, "JPEG")
+    return SimpleUploadedFile(name, buffer.getvalue(),
+                              content_type="image/jpeg")
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class ThumbnailTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="painter")
+        cls.authorized_client = Client()
+        cls.authorized_client.force_login(cls.user)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+
+    def test_thumbnail_is_built_outside_of_request(self):
+        self.authorized_client.post(reverse("new_post"),
+                                    {"text": "С картинкой",
+                                     "image": make_image()})
+        post = Post.objects.get()
+        self.assertTrue(ThumbnailJob.objects.filter(post=post).exists())
+        self.assertEqual(post.thumbnail, "")
+        response = self.authorized_client.get(reverse("index"))
+        self.assertContains(response, post.image.url)
+
+        call_command("process_thumbnails", "--once", stdout=io.StringIO())
+        post.refresh_from_db()
+        self.assertNotEqual(post.thumbnail, "")
+        self.assertFalse(ThumbnailJob.objects.exists())
+        cache.clear()
+        response = self.authorized_client.get(reverse("index"))
+        self.assertContains(response, post.thumbnail_url)
+
+    def test_variants_fit_image_width(self):
+        self.authorized_client.post(reverse("new_post"),
+                                    {"text": "С картинкой",
+                                     "image": make_image()})
+        call_command("process_thumbnails", "--once", stdout=io.StringIO())
+        post = Post.objects.get()
+        webp = [variant["width"] for variant in post.image_variants
+                if variant["format"] == "webp"]
+        self.assertEqual(webp, [480, 960])
+        response = self.authorized_client.get(reverse("index"))
+        self.assertContains(response, 'type="image/webp"')
+        self.assertContains(response, "960w")
+
+    def test_new_image_resets_thumbnail(self):
+        self.authorized_client.post(reverse("new_post"),
+                                    {"text": "С картинкой",
+                                     "image": make_image()})
+        call_command("process_thumbnails", "--once", stdout=io.StringIO())
+        post = Post.objects.get()
+        self.authorized_client.post(
+            reverse("post_edit", args=[self.user.username, post.pk]),
+            {"text": "Новая картинка", "image": make_image("other.jpg")}
+        )
+        post.refresh_from_db()
+        self.assertEqual(post.thumbnail, "")
+        self.assertTrue(ThumbnailJob.objects.filter(post=post).exists())
+
+    def test_new_image_replaces_variant_files(self):
+        self.authorized_client.post(reverse("new_post"),
+                                    {"text": "С картинкой",
+                                     "image": make_image()})
+        call_command("process_thumbnails", "--once", stdout=io.StringIO())
+        post = Post.objects.get()
+        old = [variant["name"] for variant in post.image_variants]
+        storage = post.image.storage
+        # Rebuilding the same image keeps the names and the files.
+        call_command("pregenerate_thumbnails", "--force", "--workers", "1",
+                     stdout=io.StringIO())
+        post.refresh_from_db()
+        self.assertEqual([variant["name"] for variant in post.image_variants],
+                         old)
+        self.assertTrue(all(storage.exists(name) for name in old))
+
+        self.authorized_client.post(
+            reverse("post_edit", args=[self.user.username, post.pk]),
+            {"text": "Новая картинка",
+             "image": make_image("other.jpg", (30, 30, 200))}
+        )
+        call_command("process_thumbnails", "--once", stdout=io.StringIO())
+        post.refresh_from_db()
+        new = [variant["name"] for variant in post.image_variants]
+        self.assertTrue(new)
+        self.assertFalse(set(new) & set(old))
+        self.assertTrue(all(storage.exists(name) for name in new))
+        self.assertFalse(any(storage.exists(name) for name in old))
+
+    def test_pregenerate_builds_missing_thumbnails(self):
+        self.authorized_client.post(reverse("new_post"),
+                                    {"text": "С картинкой",
+                                     "image": make_image()})
+        call_command("pregenerate_thumbnails", "--workers", "1",
+                     stdout=io.StringIO())
+        post = Post.objects.get()
+        self.assertNotEqual(post.thumbnail, "")
+        self.assertFalse(ThumbnailJob.objects.exists())
+
+    def test_pregenerate_reports_failures(self):
+        self.authorized_client.post(reverse("new_post"),
+                                    {"text": "С картинкой",
+                                     "image": make_image()})
+        output = io.StringIO()
+        with mock.patch("posts.images.process_post",
+                        side_effect=OSError("broken")), \
+                self.assertLogs("posts.management.commands."
+                                "pregenerate_thumbnails", "ERROR") as logs:
+            call_command("pregenerate_thumbnails", "--workers", "1",
+                         stdout=output)
+        post = Post.objects.get()
+        self.assertIn(f"post {post.pk} failed", logs.output[0])
+        self.assertIn("Built 0 of 1 thumbnails, 1 failed.", output.getvalue())
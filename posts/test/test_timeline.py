@@ -0,0 +1,80 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from posts import timeline
+from posts.models import Follow, Post, TimelineEntry
+
+User = get_user_model()
+
+
+class TimelineTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='StasBasov')
+        cls.author = User.objects.create_user(username='ProstoStas')
+        cls.authorizer_client = Client()
+        cls.authorizer_client.force_login(cls.user)
+
+    def setUp(self):
+        cache.clear()
+
+    def feed(self):
+        response = self.authorizer_client.get(reverse('follow_index'))
+        return [post.text for post in response.context['page']]
+
+    def test_fan_out_and_unfollow(self):
+        Follow.objects.create(user=self.user, author=self.author)
+        Post.objects.create(text='Новый пост', author=self.author)
+        self.assertEqual(TimelineEntry.objects.filter(user=self.user).count(),
+                         1)
+        self.assertEqual(self.feed(), ['Новый пост'])
+        Follow.objects.filter(user=self.user, author=self.author).delete()
+        self.assertEqual(self.feed(), [])
+
+    @override_settings(TIMELINE_SIZE=3)
+    def test_backfill_is_capped(self):
+        for i in range(5):
+            Post.objects.create(text=f'Пост {i}', author=self.author)
+        Follow.objects.create(user=self.user, author=self.author)
+        self.assertEqual(self.feed(), ['Пост 4', 'Пост 3', 'Пост 2'])
+
+    @override_settings(TIMELINE_SIZE=2)
+    def test_trim_keeps_the_feed_order(self):
+        posts = [Post.objects.create(text=f'Пост {i}', author=self.author)
+                 for i in range(3)]
+        # Equal dates, so the post id decides as in the feed.
+        now = timezone.now()
+        TimelineEntry.objects.bulk_create(
+            [TimelineEntry(user=self.user, post=post, pub_date=now)
+             for post in posts]
+        )
+        with CaptureQueriesContext(connection) as queries:
+            timeline.trim([self.user.pk])
+        self.assertNotIn('JOIN', queries[0]['sql'])
+        self.assertEqual(
+            sorted(TimelineEntry.objects.values_list('post_id', flat=True)),
+            [posts[1].pk, posts[2].pk]
+        )
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=0)
+    def test_pulled_authors_are_merged(self):
+        Follow.objects.create(user=self.user, author=self.author)
+        Post.objects.create(text='Пост', author=self.author)
+        self.assertFalse(TimelineEntry.objects.exists())
+        self.assertEqual(self.feed(), ['Пост'])
+
+    def test_rebuild_command(self):
+        Follow.objects.create(user=self.user, author=self.author)
+        Post.objects.create(text='Пост', author=self.author)
+        TimelineEntry.objects.all().delete()
+        call_command('rebuild_timelines', stdout=StringIO())
+        self.assertEqual(self.feed(), ['Пост'])
@@ -0,0 +1,98 @@
+import gzip
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from posts import transfer
+from posts.models import Comment, Follow, Group, Post, UserStats
+
+User = get_user_model()
+
+
+class TransferTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='StasBasov')
+        cls.reader = User.objects.create_user(username='ProstoStas')
+        cls.group = Group.objects.create(title='test', description='test',
+                                         slug='test')
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def path(self, name):
+        return os.path.join(self.directory.name, name)
+
+    def create_posts(self):
+        posts = [Post.objects.create(text=f'Пост {number}',
+                                     author=self.author, group=self.group)
+                 for number in range(5)]
+        Comment.objects.create(post=posts[0], author=self.reader,
+                               text='Коммент')
+        Follow.objects.create(user=self.reader, author=self.author)
+        return posts
+
+    def clear(self):
+        for model in (Comment, Follow, Post, UserStats, Group, User):
+            model.objects.all().delete()
+
+    def test_round_trip(self):
+        posts = self.create_posts()
+        path = self.path('dump.jsonl.gz')
+        call_command('export_yatube', path, batch_size=2, stdout=StringIO())
+        with gzip.open(path, 'rt') as file:
+            models = [json.loads(line)['model'] for line in file]
+        self.assertLess(models.index('auth.user'),
+                        models.index('posts.post'))
+        self.clear()
+        call_command('import_yatube', path, batch_size=2, stdout=StringIO())
+        self.assertEqual(
+            list(Post.objects.order_by('pk').values_list('pk', 'pub_date')),
+            [(post.pk, post.pub_date) for post in posts]
+        )
+        self.assertTrue(Follow.objects.filter(user=self.reader).exists())
+        self.assertEqual(Post.objects.get(pk=posts[0].pk).comments_count, 1)
+        self.assertEqual(UserStats.objects.get(user=self.author).posts_count,
+                         5)
+        self.assertFalse(os.path.exists(f'{path}.checkpoint'))
+
+    def test_reads_dumpdata_array(self):
+        path = self.path('dump.json')
+        records = [
+            {'model': 'posts.post', 'pk': 7, 'fields': {
+                'text': 'Старый пост', 'author': self.author.pk,
+                'group': None, 'image': '',
+                'pub_date': '1854-03-14T00:00:00Z'}},
+            {'model': 'contenttypes.contenttype', 'pk': 1, 'fields': {
+                'app_label': 'posts', 'model': 'post'}},
+        ]
+        with open(path, 'w') as file:
+            json.dump(records, file, indent=4)
+        transfer.CHUNK_SIZE = 16
+        self.addCleanup(setattr, transfer, 'CHUNK_SIZE', 1 << 16)
+        self.assertEqual(list(transfer.read_records(path)), records)
+        call_command('import_yatube', path, exclude=['contenttypes'],
+                     skip_derived=True, stdout=StringIO())
+        post = Post.objects.get(pk=7)
+        self.assertEqual(post.pub_date.year, 1854)
+
+    def test_resume_from_checkpoint(self):
+        posts = self.create_posts()
+        path = self.path('dump.jsonl')
+        call_command('export_yatube', path, models=['posts.post'],
+                     stdout=StringIO())
+        Post.objects.all().delete()
+        with open(f'{path}.checkpoint', 'w') as checkpoint:
+            json.dump({'records': 3}, checkpoint)
+        call_command('import_yatube', path, skip_derived=True,
+                     stdout=StringIO())
+        self.assertEqual(list(Post.objects.values_list('pk', flat=True)
+                              .order_by('pk')),
+                         [post.pk for post in posts[3:]])
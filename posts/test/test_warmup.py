@@ -0,0 +1,76 @@
+import os
+import subprocess
+import sys
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+
+from posts import warmup
+from posts.management.commands.startup_report import parse_importtime
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+class WarmUpTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='StasBasov')
+        cls.group = Group.objects.create(title='test', description='test',
+                                         slug='test')
+        Post.objects.create(text='Пост', author=cls.author,
+                            group=cls.group)
+        cls.unauthorized_client = Client()
+
+    def setUp(self):
+        cache.clear()
+
+    def test_all_templates_compile(self):
+        self.assertGreater(warmup.compile_templates(), 10)
+
+    def test_hot_pages_are_cached(self):
+        timings = warmup.warm_up()
+        self.assertIn('pages', timings)
+        for path in ('/', '/group/test/', '/StasBasov/'):
+            response = self.unauthorized_client.get(path)
+            self.assertEqual(response['X-Page-Cache'], 'hit')
+
+    def test_failing_page_does_not_stop_warm_up(self):
+        with mock.patch('posts.views.render',
+                        side_effect=RuntimeError('broken')), \
+                self.assertLogs('posts.warmup', 'ERROR'):
+            timings = warmup.warm_up()
+        self.assertEqual(set(timings),
+                         {'templates', 'urls', 'database', 'pages'})
+
+    def test_admin_urls_with_warmup(self):
+        # The URLconf must not be built before the admin autodiscovers.
+        script = (
+            'import django; django.setup()\n'
+            'from django.urls import reverse\n'
+            'from posts import warmup\n'
+            'warmup.populate_urls()\n'
+            'print(reverse("admin:posts_post_changelist"))\n'
+            'print(reverse("admin:auth_user_changelist"))\n'
+        )
+        env = {**os.environ, 'WARMUP': '1',
+               'DJANGO_SETTINGS_MODULE': 'yatube.settings'}
+        process = subprocess.run([sys.executable, '-c', script],
+                                 cwd=settings.BASE_DIR, env=env,
+                                 capture_output=True, text=True)
+        self.assertEqual(process.returncode, 0, process.stderr)
+        self.assertEqual(process.stdout.split(),
+                         ['/admin/posts/post/', '/admin/auth/user/'])
+
+    def test_parse_importtime(self):
+        modules = parse_importtime([
+            'import time: self [us] | cumulative | imported package',
+            'import time:       120 |        120 |     posts.models',
+            'import time:        80 |        200 |   posts',
+        ])
+        self.assertEqual(modules, {'posts.models': (120, 120),
+                                   'posts': (80, 200)})
@@ -0,0 +1,136 @@
+"""Materialized follow timelines.
+
+Every follower of an author gets a ``TimelineEntry`` row when the author
+publishes, so the follow page reads one indexed slice of its own rows
+instead of joining ``Follow`` and ``Post``. Authors with more than
+``TIMELINE_FANOUT_LIMIT`` followers are not fanned out; their posts are
+pulled at read time and merged into the slice.
+"""
+import heapq
+
+from django.conf import settings
+from django.core.cache import cache
+
+from posts import follow_graph, metrics
+from posts.models import Follow, Post, TimelineEntry, UserStats
+from posts.paginator import KeysetPaginator
+
+PULL_AUTHORS_KEY = "timeline:pull_authors"
+PULL_AUTHORS_TIMEOUT = 60 * 60
+
+
+def pull_author_ids():
+    author_ids = cache.get(PULL_AUTHORS_KEY)
+    metrics.cache_lookup(int(author_ids is not None), int(author_ids is None))
+    if author_ids is None:
+        author_ids = frozenset(
+            UserStats.objects
+            .filter(followers_count__gt=settings.TIMELINE_FANOUT_LIMIT)
+            .values_list("user_id", flat=True)
+        )
+        cache.set(PULL_AUTHORS_KEY, author_ids, PULL_AUTHORS_TIMEOUT)
+    return author_ids
+
+
+def trim(user_ids):
+    for user_id in user_ids:
+        stale = (TimelineEntry.objects.filter(user_id=user_id)
+                 .order_by("-pub_date", "-post_id")
+                 .values_list("pk", flat=True)[settings.TIMELINE_SIZE:])
+        TimelineEntry.objects.filter(pk__in=list(stale)).delete()
+
+
+def fan_out(post):
+    if post.author_id in pull_author_ids():
+        return
+    follower_ids = list(Follow.objects.filter(author_id=post.author_id)
+                        .values_list("user_id", flat=True))
+    TimelineEntry.objects.bulk_create(
+        [TimelineEntry(user_id=user_id, post=post, pub_date=post.pub_date)
+         for user_id in follower_ids],
+        batch_size=500, ignore_conflicts=True
+    )
+    # Trimming every follower on every post would cost more than the
+    # insert itself, so it is amortized over TIMELINE_TRIM_EVERY posts.
+    if post.pk % settings.TIMELINE_TRIM_EVERY == 0:
+        trim(follower_ids)
+
+
+def backfill(user_id, author_id):
+    if author_id in pull_author_ids():
+        return
+    posts = (Post.objects.filter(author_id=author_id)
+             .order_by("-pub_date")
+             .values_list("pk", "pub_date")[:settings.TIMELINE_SIZE])
+    TimelineEntry.objects.bulk_create(
+        [TimelineEntry(user_id=user_id, post_id=pk, pub_date=pub_date)
+         for pk, pub_date in posts],
+        batch_size=500, ignore_conflicts=True
+    )
+    trim([user_id])
+
+
+def remove(user_id, author_id):
+    TimelineEntry.objects.filter(user_id=user_id,
+                                 post__author_id=author_id).delete()
+
+
+def rebuild(user_id):
+    TimelineEntry.objects.filter(user_id=user_id).delete()
+    author_ids = (Follow.objects.filter(user_id=user_id)
+                  .exclude(author_id__in=pull_author_ids())
+                  .values_list("author_id", flat=True))
+    posts = (Post.objects.filter(author_id__in=list(author_ids))
+             .order_by("-pub_date")
+             .values_list("pk", "pub_date")[:settings.TIMELINE_SIZE])
+    TimelineEntry.objects.bulk_create(
+        [TimelineEntry(user_id=user_id, post_id=pk, pub_date=pub_date)
+         for pk, pub_date in posts],
+        batch_size=500
+    )
+
+
+class TimelinePaginator(KeysetPaginator):
+    """Keyset pages over a user's timeline plus pulled authors' posts.
+
+    Timeline rows are keyed on ``(pub_date, post_id)`` and posts on
+    ``(pub_date, id)``, so one cursor addresses both sources. Ordering by
+    ``post_id`` rather than ``post`` matters: the latter sorts by the
+    post's own default ordering and defeats the timeline index.
+    """
+
+    def __init__(self, user, per_page):
+        self.user = user
+        pulled = sorted(follow_graph.followed_among(user,
+                                                    pull_author_ids()))
+        self.pulled = pulled
+        super().__init__(
+            Post.objects.select_related("author", "group")
+            .filter(author_id__in=pulled),
+            per_page
+        )
+
+    def _rows(self, values=None, direction="lt", offset=0):
+        descending = direction == "lt"
+        prefix = "-" if descending else ""
+        limit = offset + self.per_page + 1
+        entries = (TimelineEntry.objects.filter(user=self.user)
+                   .select_related("post__author", "post__group")
+                   .order_by(prefix + "pub_date", prefix + "post_id"))
+        if values is not None:
+            entries = entries.filter(
+                self._seek(values, direction, keys=("pub_date", "post_id"))
+            )
+        posts = [entry.post for entry in entries[:limit]]
+        if self.pulled:
+            pulled = self._ordered(descending)
+            if values is not None:
+                pulled = pulled.filter(self._seek(values, direction))
+            posts = heapq.merge(posts, pulled[:limit], reverse=descending,
+                                key=lambda post: (post.pub_date, post.pk))
+        rows, seen = [], set()
+        for post in posts:
+            if post.pk not in seen:
+                seen.add(post.pk)
+                rows.append(post)
+        return rows[offset:limit]
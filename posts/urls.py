@@ -1,21 +1,31 @@
+from django.conf import settings
 from django.urls import path
 
-from posts import views
+from posts import async_views, metrics, views
+
+read_views = async_views if settings.ASYNC_VIEWS else views
 
 urlpatterns = [
-    path("", views.index, name="index"),
+    path("", read_views.index, name="index"),
     path("groups/", views.groups_index, name="groups_index"),
-    path("group/<slug:slug>/", views.group_posts, name="group_posts"),
+    path("group/<slug:slug>/", read_views.group_posts, name="group_posts"),
     path("new/", views.new_post, name="new_post"),
-    path("follow/", views.follow_index, name="follow_index"),
+    path("search/", views.search_posts, name="search"),
+    path("metrics", metrics.metrics_view, name="metrics"),
+    path("follow/", read_views.follow_index, name="follow_index"),
     path("<str:username>/follow/",
          views.profile_follow, name="profile_follow"),
 
     path("<str:username>/unfollow/",
          views.profile_unfollow, name="profile_unfollow"),
 
-    path("<str:username>/", views.profile, name="profile"),
-    path("<str:username>/<int:post_id>/", views.post_view, name="post"),
+    path("<str:username>/export/",
+         read_views.profile_export, name="profile_export"),
+
+    path("<str:username>/", read_views.profile, name="profile"),
+    path("<str:username>/<int:post_id>/", read_views.post_view, name="post"),
+    path("<str:username>/<int:post_id>/comments/",
+         views.post_comments, name="post_comments"),
     path("<username>/<int:post_id>/comment/",
          views.add_comment, name="add_comment"),
 
@@ -1,19 +1,51 @@
+from urllib.parse import urlencode
+
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
+from django.http import Http404, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
-from django.views.decorators.cache import cache_page
 
+from posts import counters, exports, follow_graph
+from posts import search as full_text
 from posts.forms import CommentForm, PostForm
+from posts.edge_cache import edge_cacheable
+from posts.fragments import attach_fragments
 from posts.models import Follow, Group, Post, User
+from posts.page_cache import conditional_page, versioned_cache_page
+from posts.paginator import KeysetPaginator
+from posts.query_budget import query_budget
+from posts.ratelimit import ratelimit
+from posts.timeline import TimelinePaginator
+
+COMMENTS_PER_PAGE = 20
+
+
+def feed_scopes(request):
+    return ["posts"]
+
+
+def group_scopes(request, slug):
+    return [f"group:{slug}"]
+
+
+def profile_scopes(request, username):
+    return [f"user:{username}"]
+
 
+def post_scopes(request, username, post_id):
+    return [f"post:{post_id}", f"user:{username}"]
 
-@cache_page(1 * 5, key_prefix="index_page")
+
+@query_budget(3)
+@edge_cacheable(feed_scopes)
+@conditional_page(feed_scopes)
+@versioned_cache_page(feed_scopes)
 def index(request):
-    posts_list = Post.objects.select_related('group').order_by("-pub_date").all()
-    paginator = Paginator(posts_list, 5)
-    page_number = request.GET.get("page")
-    page = paginator.get_page(page_number)
+    posts_list = Post.objects.select_related("author", "group").all()
+    paginator = KeysetPaginator(posts_list, 5)
+    page = paginator.get_page(request.GET)
+    attach_fragments(page, "includes/post_in_index_body.html")
     return render(
         request,
         "index.html",
@@ -21,8 +53,9 @@ def index(request):
     )
 
 
+@query_budget(4)
 def groups_index(request):
-    groups_list = Group.objects.all()
+    groups_list = Group.objects.select_related("stats").order_by("pk")
     paginator = Paginator(groups_list, 10)
     page_number = request.GET.get("page")
     page = paginator.get_page(page_number)
@@ -33,13 +66,16 @@ def groups_index(request):
     )
 
 
+@query_budget(4)
+@edge_cacheable(group_scopes)
+@conditional_page(group_scopes)
+@versioned_cache_page(group_scopes)
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    posts = group.posts_in_group.order_by("-pub_date").all()
-    paginator = Paginator(posts, 5)
-
-    page_number = request.GET.get("page")
-    page = paginator.get_page(page_number)
+    posts = group.posts_in_group.select_related("author").all()
+    paginator = KeysetPaginator(posts, 5)
+    page = paginator.get_page(request.GET)
+    attach_fragments(page, "includes/post_in_index_body.html")
     return render(
         request,
         "group.html",
@@ -47,7 +83,26 @@ def group_posts(request, slug):
     )
 
 
+@query_budget(4)
+def search_posts(request):
+    query = request.GET.get("q", "").strip()
+    paginator = full_text.SearchPaginator(query, 10)
+    page = paginator.get_page(request.GET)
+    posts = Post.objects.select_related("author").in_bulk(
+        {hit.post_id for hit in page}
+    )
+    for hit in page:
+        hit.post = posts.get(hit.post_id)
+    return render(
+        request,
+        "search.html",
+        {"query": query, "page": page,
+         "querystring": urlencode({"q": query})}
+    )
+
+
 @login_required
+@ratelimit("post")
 def new_post(request):
     if request.method != "POST":
         form = PostForm()
@@ -64,38 +119,93 @@ def new_post(request):
     return render(request, "new.html", {"form": form})
 
 
+@query_budget(5)
+@edge_cacheable(profile_scopes)
+@conditional_page(profile_scopes)
+@versioned_cache_page(profile_scopes)
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
+    author = get_object_or_404(User.objects.select_related("stats"),
+                               username=username)
     posts = author.posts.all()
-    paginator = Paginator(posts, 5)
-    page_number = request.GET.get("page")
-    page = paginator.get_page(page_number)
-    followers = [id[0] for id in author.following.values_list("user")]
+    paginator = KeysetPaginator(posts, 5)
+    page = paginator.get_page(request.GET)
+    attach_fragments(page, "includes/post_card_body.html")
     return render(
         request,
         "profile.html",
         {"posts": posts, "author": author,
+         "stats": counters.user_stats(author),
          "page": page, "paginator": paginator,
-         "followers": followers}
+         "is_following": follow_graph.is_following(request.user, author)}
+    )
+
+
+@login_required
+def profile_export(request, username):
+    author = get_object_or_404(User, username=username)
+    if request.user.id != author.id and not request.user.is_staff:
+        return redirect("profile", username)
+    export_format = request.GET.get("format", "jsonl")
+    if export_format not in exports.FORMATS:
+        raise Http404
+    archive, content_type = exports.FORMATS[export_format]
+    response = StreamingHttpResponse(archive(author),
+                                     content_type=content_type)
+    response["Content-Disposition"] = (
+        f'attachment; filename="{author.username}.{export_format}"'
     )
+    response["Cache-Control"] = "private, no-store"
+    # Let nginx pass chunks on as they come instead of buffering them.
+    response["X-Accel-Buffering"] = "no"
+    return response
 
 
+@query_budget(5)
+@edge_cacheable(post_scopes)
+@conditional_page(post_scopes)
 def post_view(request, username, post_id):
-    post = get_object_or_404(Post, author__username=username, pk=post_id)
+    post = get_object_or_404(Post.objects.select_related("author__stats"),
+                             author__username=username, pk=post_id)
     author = post.author
-    posts = author.posts.all()
+    attach_fragments([post], "includes/post_card_body.html")
     form = CommentForm()
-    comments = post.comments.all()
-    followers = [id[0] for id in author.following.values_list("user")]
+    comments = comments_page(post, request.GET)
     return render(
         request,
         "post.html",
-        {"post": post, "author": author, "posts": posts,
-         "comments": comments, "form": form, "followers": followers}
+        {"post": post, "author": author,
+         "stats": counters.user_stats(author),
+         "comments": comments, "form": form,
+         "is_following": follow_graph.is_following(request.user, author)}
     )
 
 
+def comments_page(post, params):
+    paginator = KeysetPaginator(post.comments.select_related("author"),
+                                COMMENTS_PER_PAGE, keys=("created", "id"))
+    return paginator.get_page(params)
+
+
+@query_budget(4)
+def post_comments(request, username, post_id):
+    post = get_object_or_404(Post.objects.select_related("author"),
+                             author__username=username, pk=post_id)
+    comments = comments_page(post, request.GET)
+    if request.GET.get("format") == "json":
+        return JsonResponse({
+            "comments": [{"id": comment.pk,
+                          "author": comment.author.username,
+                          "text": comment.text,
+                          "created": comment.created.isoformat()}
+                         for comment in comments],
+            "next": comments.next_cursor(),
+        })
+    return render(request, "comment_list.html",
+                  {"post": post, "comments": comments})
+
+
 @login_required
+@ratelimit("post")
 def post_edit(request, username, post_id):
     is_edit = True
     post = get_object_or_404(Post, pk=post_id)
@@ -118,6 +228,7 @@ def post_edit(request, username, post_id):
 
 
 @login_required
+@ratelimit("comment")
 def add_comment(request, username, post_id):
     post = get_object_or_404(Post, pk=post_id)
     form = CommentForm(request.POST or None)
@@ -139,17 +250,18 @@ def server_error(request):
     return render(request, "misc/500.html", status=500)
 
 
+@query_budget(6)
 @login_required
 def follow_index(request):
-    posts = Post.objects.filter(author__following__user=request.user)
-    paginator = Paginator(posts, 10)
-    page_number = request.GET.get("page")
-    page = paginator.get_page(page_number)
+    paginator = TimelinePaginator(request.user, 10)
+    page = paginator.get_page(request.GET)
+    attach_fragments(page, "includes/post_in_index_body.html")
     return render(request, "follow.html",
                   {"page": page, "paginator": paginator})
 
 
 @login_required
+@ratelimit("follow", methods=("GET", "POST"))
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
     if request.user != author:
@@ -158,6 +270,7 @@ def profile_follow(request, username):
 
 
 @login_required
+@ratelimit("follow", methods=("GET", "POST"))
 def profile_unfollow(request, username):
     author = get_object_or_404(User, username=username)
     Follow.objects.filter(user=request.user, author=author).delete()
@@ -0,0 +1,113 @@
+"""Warm-up of a fresh worker before it serves its first request.
+
+``warm_up`` compiles every template under the ``TEMPLATES`` directories
+into the cached template loader, builds the URL resolver with all its
+patterns, opens the database connections and renders the index, the
+groups list and the ``WARMUP_PAGES`` busiest group and profile pages for
+anonymous visitors, which fills the page and fragment caches.
+``gunicorn.conf.py`` calls it in every worker between loading the app and
+accepting connections.
+
+It may not run from ``AppConfig.ready``: the URLconf would be built
+before the admin autodiscovers its models. A step that fails is logged
+and skipped, warm-up never keeps a worker from serving.
+"""
+import logging
+import os
+import time
+
+from django.conf import settings
+from django.db import connections
+from django.template import engines
+from django.urls import Resolver404, get_resolver
+
+logger = logging.getLogger(__name__)
+
+
+def compile_templates():
+    compiled = 0
+    for engine in engines.all():
+        for directory in engine.engine.dirs:
+            for root, _, files in os.walk(directory):
+                for file_name in files:
+                    if not file_name.endswith(".html"):
+                        continue
+                    name = os.path.relpath(os.path.join(root, file_name),
+                                           directory)
+                    try:
+                        engine.get_template(name)
+                    except Exception:
+                        logger.exception("Template %s does not compile",
+                                         name)
+                        continue
+                    compiled += 1
+    return compiled
+
+
+def populate_urls():
+    resolver = get_resolver()
+    resolver.reverse_dict
+    # A path no pattern matches makes the resolver compile all of them.
+    try:
+        resolver.resolve("/warm-up/-/-/-/-/")
+    except Resolver404:
+        pass
+
+
+def open_connections():
+    # Request threads of a gthread worker open their own connections;
+    # this one still loads the pragmas and warms the OS page cache.
+    for connection in connections.all():
+        connection.ensure_connection()
+
+
+def hot_paths():
+    from django.urls import reverse
+
+    from posts.models import GroupStats, UserStats
+
+    paths = [reverse("index"), reverse("groups_index")]
+    groups = (GroupStats.objects.select_related("group")
+              .order_by("-posts_count")[:settings.WARMUP_PAGES])
+    paths += [reverse("group_posts", args=[stats.group.slug])
+              for stats in groups]
+    authors = (UserStats.objects.select_related("user")
+               .order_by("-followers_count")[:settings.WARMUP_PAGES])
+    paths += [reverse("profile", args=[stats.user.username])
+              for stats in authors]
+    return paths
+
+
+def prerender():
+    from django.test import Client
+
+    client = Client(raise_request_exception=False)
+    rendered = 0
+    for path in hot_paths():
+        try:
+            status = client.get(path).status_code
+        except Exception:
+            logger.exception("Warm-up of %s failed", path)
+            continue
+        if status == 200:
+            rendered += 1
+        else:
+            logger.warning("Warm-up of %s returned %d", path, status)
+    return rendered
+
+
+def warm_up():
+    """Run every step and return how long each took in seconds."""
+    timings = {}
+    for step, run in (("templates", compile_templates),
+                      ("urls", populate_urls),
+                      ("database", open_connections),
+                      ("pages", prerender)):
+        started = time.perf_counter()
+        try:
+            run()
+        except Exception:
+            logger.exception("Warm-up step %s failed", step)
+        timings[step] = time.perf_counter() - started
+    logger.info("Warmed up in %.0f ms", sum(timings.values()) * 1000)
+    return timings
@@ -0,0 +1,19 @@
+"""
+ASGI config for yatube project.
+
+It exposes the ASGI callable as a module-level variable named
+``application``. The read views are served by their async versions from
+``posts.async_views`` unless ``ASYNC_VIEWS`` is set to an empty value.
+
+Run it with ``uvicorn yatube.asgi:application`` or with gunicorn's
+``uvicorn.workers.UvicornWorker``.
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+os.environ.setdefault('ASYNC_VIEWS', '1')
+
+application = get_asgi_application()
@@ -0,0 +1,226 @@
+"""Cache backend shared by every worker process on one host.
+
+Entries live in a SQLite database that is memory-mapped by each process
+(put it on tmpfs such as ``/dev/shm`` to keep it off disk) and opened in
+WAL mode, so readers never block each other and a write is visible to all
+workers as soon as it commits. No separate cache server is needed.
+
+Entries carry an absolute expiry time and the time they were last read;
+once the table grows past ``MAX_ENTRIES`` the least recently used rows are
+evicted. Integers are stored natively so ``incr``/``decr`` are a single
+atomic ``UPDATE``.
+"""
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache (
+    key TEXT PRIMARY KEY,
+    value BLOB,
+    expires REAL,
+    accessed REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed);
+"""
+
+# Reads refresh ``accessed`` at most this often, so a hot key does not
+# turn every get into a write.
+TOUCH_INTERVAL = 1.0
+
+
+class SharedMemoryCache(BaseCache):
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get("OPTIONS", {})
+        self._path = location or "/dev/shm/yatube-cache.sqlite3"
+        self._mmap_size = int(options.get("MMAP_SIZE", 256 * 1024 * 1024))
+        self._busy_timeout = float(options.get("BUSY_TIMEOUT", 5))
+        self._cull_every = int(options.get("CULL_EVERY", 100))
+        self._local = threading.local()
+        self._sets = 0
+
+    @property
+    def _db(self):
+        # Connections must not cross a fork, so they are per process and
+        # per thread.
+        local = self._local
+        if getattr(local, "pid", None) != os.getpid():
+            local.connection = self._connect()
+            local.pid = os.getpid()
+        return local.connection
+
+    def _connect(self):
+        connection = sqlite3.connect(self._path, timeout=self._busy_timeout,
+                                     isolation_level=None,
+                                     check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=OFF")
+        connection.execute(f"PRAGMA mmap_size={self._mmap_size}")
+        connection.executescript(SCHEMA)
+        return connection
+
+    @staticmethod
+    def _dumps(value):
+        if type(value) is int and -2 ** 63 <= value < 2 ** 63:
+            return value
+        return pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def _loads(value):
+        if isinstance(value, int):
+            return value
+        return pickle.loads(value)
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def _expires(self, timeout):
+        return self.get_backend_timeout(timeout)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        now = time.time()
+        cursor = self._db.execute(
+            "INSERT INTO cache (key, value, expires, accessed) "
+            "VALUES (?, ?, ?, ?) ON CONFLICT (key) DO UPDATE SET "
+            "value = excluded.value, expires = excluded.expires, "
+            "accessed = excluded.accessed "
+            "WHERE cache.expires IS NOT NULL AND cache.expires <= ?",
+            (key, self._dumps(value), self._expires(timeout), now, now)
+        )
+        if cursor.rowcount:
+            self._maybe_cull()
+        return cursor.rowcount > 0
+
+    def get(self, key, default=None, version=None):
+        key = self._key(key, version)
+        now = time.time()
+        row = self._db.execute(
+            "SELECT value, accessed FROM cache WHERE key = ? "
+            "AND (expires IS NULL OR expires > ?)", (key, now)
+        ).fetchone()
+        if row is None:
+            return default
+        if row[1] < now - TOUCH_INTERVAL:
+            self._db.execute("UPDATE cache SET accessed = ? WHERE key = ?",
+                             (now, key))
+        return self._loads(row[0])
+
+    def get_many(self, keys, version=None):
+        if not keys:
+            return {}
+        keymap = {self._key(key, version): key for key in keys}
+        placeholders = ", ".join("?" * len(keymap))
+        rows = self._db.execute(
+            f"SELECT key, value FROM cache WHERE key IN ({placeholders}) "
+            "AND (expires IS NULL OR expires > ?)",
+            (*keymap, time.time())
+        ).fetchall()
+        return {keymap[key]: self._loads(value) for key, value in rows}
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self._db.execute(
+            "INSERT OR REPLACE INTO cache (key, value, expires, accessed) "
+            "VALUES (?, ?, ?, ?)",
+            (self._key(key, version), self._dumps(value),
+             self._expires(timeout), time.time())
+        )
+        self._maybe_cull()
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        expires = self._expires(timeout)
+        now = time.time()
+        rows = [(self._key(key, version), self._dumps(value), expires, now)
+                for key, value in data.items()]
+        db = self._db
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            db.executemany(
+                "INSERT OR REPLACE INTO cache (key, value, expires, accessed) "
+                "VALUES (?, ?, ?, ?)", rows
+            )
+        except Exception:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
+        self._maybe_cull()
+        return []
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        cursor = self._db.execute(
+            "UPDATE cache SET expires = ? WHERE key = ? "
+            "AND (expires IS NULL OR expires > ?)",
+            (self._expires(timeout), self._key(key, version), time.time())
+        )
+        return cursor.rowcount > 0
+
+    def delete(self, key, version=None):
+        cursor = self._db.execute("DELETE FROM cache WHERE key = ?",
+                                  (self._key(key, version),))
+        return cursor.rowcount > 0
+
+    def delete_many(self, keys, version=None):
+        self._db.executemany("DELETE FROM cache WHERE key = ?",
+                             [(self._key(key, version),) for key in keys])
+
+    def has_key(self, key, version=None):
+        return self._db.execute(
+            "SELECT 1 FROM cache WHERE key = ? "
+            "AND (expires IS NULL OR expires > ?)",
+            (self._key(key, version), time.time())
+        ).fetchone() is not None
+
+    def incr(self, key, delta=1, version=None):
+        key = self._key(key, version)
+        db = self._db
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            db.execute(
+                "UPDATE cache SET value = value + ? WHERE key = ? "
+                "AND typeof(value) = 'integer' "
+                "AND (expires IS NULL OR expires > ?)",
+                (delta, key, time.time())
+            )
+            row = db.execute("SELECT value FROM cache WHERE key = ? "
+                             "AND (expires IS NULL OR expires > ?)",
+                             (key, time.time())).fetchone()
+        except Exception:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
+        if row is None:
+            raise ValueError(f"Key '{key}' not found")
+        if not isinstance(row[0], int):
+            raise TypeError(f"Value of key '{key}' is not an integer")
+        return row[0]
+
+    def clear(self):
+        self._db.execute("DELETE FROM cache")
+
+    def close(self, **kwargs):
+        # Connections are kept open for the lifetime of the worker.
+        pass
+
+    def _maybe_cull(self):
+        self._sets += 1
+        if self._sets % self._cull_every:
+            return
+        db = self._db
+        db.execute("DELETE FROM cache WHERE expires <= ?", (time.time(),))
+        count = db.execute("SELECT count(*) FROM cache").fetchone()[0]
+        if count <= self._max_entries:
+            return
+        excess = count - self._max_entries
+        if self._cull_frequency:
+            excess += self._max_entries // self._cull_frequency
+        db.execute(
+            "DELETE FROM cache WHERE key IN "
+            "(SELECT key FROM cache ORDER BY accessed LIMIT ?)", (excess,)
+        )
@@ -0,0 +1,24 @@
+class ReadReplicaRouter:
+    """Send reads to the ``replica`` connection and writes to ``default``.
+
+    The replica is a second, ``query_only`` connection to the same WAL
+    database (or to a copy kept up to date by a replication tool), so
+    reads never queue behind a write transaction. Inside a transaction on
+    ``default`` reads stay there to see the transaction's own writes.
+    """
+
+    def db_for_read(self, model, **hints):
+        from django.db import connections
+
+        if connections["default"].in_atomic_block:
+            return "default"
+        return "replica"
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == "default"
@@ -46,13 +46,16 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'posts.metrics.MetricsMiddleware',
+    'posts.query_budget.QueryBudgetMiddleware',
+    'posts.profiling.ProfilingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
 ]
 
 ROOT_URLCONF = 'yatube.urls'
@@ -63,7 +66,7 @@ MISC_DIR = os.path.join(BASE_DIR, 'templates/misc')
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'posts.metrics.TimedDjangoTemplates',
         'DIRS': [TEMPLATES_DIR, INCLUDES_DIR, MISC_DIR],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -79,13 +82,41 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
-DATABASES = {
+# DATABASE_PROFILE selects the database settings: 'default' is stock
+# SQLite, 'production' adds WAL and tuned pragmas (see yatube/sqlite),
+# persistent connections and health checks. DATABASE_REPLICA=1 routes
+# reads to a query-only connection to DATABASE_REPLICA_NAME (the primary
+# file by default) and writes to the primary.
+DATABASE_NAME = os.getenv('DATABASE_NAME',
+                          os.path.join(BASE_DIR, 'db.sqlite3'))
+
+DATABASE_PROFILES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
-    }
+        'NAME': DATABASE_NAME,
+    },
+    'production': {
+        'ENGINE': 'yatube.sqlite',
+        'NAME': DATABASE_NAME,
+        'CONN_MAX_AGE': int(os.getenv('DATABASE_CONN_MAX_AGE', 600)),
+        'CONN_HEALTH_CHECKS': True,
+    },
 }
 
+DATABASES = {
+    'default': DATABASE_PROFILES[os.getenv('DATABASE_PROFILE', 'default')],
+}
+
+if os.getenv('DATABASE_REPLICA'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'ENGINE': 'yatube.sqlite',
+        'NAME': os.getenv('DATABASE_REPLICA_NAME', DATABASE_NAME),
+        'PRAGMAS': {'query_only': 'ON'},
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_ROUTERS = ['yatube.routers.ReadReplicaRouter']
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -113,7 +144,10 @@ USE_L10N = True
 USE_TZ = True
 
 STATIC_URL = '/static/'
-STATIC_ROOT = os.path.join(BASE_DIR, 'static')
+STATIC_ROOT = os.getenv('STATIC_ROOT', os.path.join(BASE_DIR, 'static'))
+# Hashed file names with gzip and Brotli copies made by collectstatic;
+# WhiteNoise sends hashed files with an immutable, year-long max-age.
+STATICFILES_STORAGE = 'yatube.storage.StaticFilesStorage'
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
@@ -130,8 +164,87 @@ EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 
 SITE_ID = 1
 
-CACHES = {
-    'default': {
+# CACHE_BACKEND selects the default cache: 'locmem' keeps a cache per
+# process, 'shared' is one cache for every worker on the host and 'redis'
+# talks to a Redis-protocol server (needs the django-redis package).
+CACHE_BACKENDS = {
+    'locmem': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+    },
+    'shared': {
+        'BACKEND': 'yatube.cache_backends.SharedMemoryCache',
+        'LOCATION': os.getenv('CACHE_LOCATION',
+                              '/dev/shm/yatube-cache.sqlite3'),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.getenv('CACHE_MAX_ENTRIES', 100000)),
+        },
+    },
+    'redis': {
+        'BACKEND': 'django_redis.cache.RedisCache',
+        'LOCATION': os.getenv('CACHE_LOCATION', 'redis://127.0.0.1:6379/1'),
+    },
 }
+
+CACHES = {
+    'default': CACHE_BACKENDS[os.getenv('CACHE_BACKEND', 'locmem')],
+}
+
+# Follow timelines: per-user cap, authors with more followers than
+# TIMELINE_FANOUT_LIMIT are read on demand instead of fanned out.
+TIMELINE_SIZE = 1000
+TIMELINE_FANOUT_LIMIT = 10000
+TIMELINE_TRIM_EVERY = 50
+
+# Pages are invalidated by model signals, the TTL only bounds memory use.
+PAGE_CACHE_TIMEOUT = 60 * 60
+FRAGMENT_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Anonymous pages may be kept by nginx for EDGE_CACHE_TIMEOUT seconds;
+# writes refresh them through the internal nginx listener EDGE_CACHE_URL
+# (disabled when empty).
+EDGE_CACHE_TIMEOUT = int(os.getenv('EDGE_CACHE_TIMEOUT', 10))
+EDGE_CACHE_URL = os.getenv('EDGE_CACHE_URL', '')
+
+# Serve the read views from posts.async_views (set by yatube/asgi.py) and
+# the number of threads they run in.
+ASYNC_VIEWS = bool(os.getenv('ASYNC_VIEWS'))
+ASYNC_VIEW_THREADS = int(os.getenv('ASYNC_VIEW_THREADS', 8))
+
+# Server-Timing headers and /metrics histograms. Worker processes share
+# their numbers through files in METRICS_DIR (only this process is
+# reported when it is empty).
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', '1') != '0'
+METRICS_DIR = os.getenv('METRICS_DIR', '')
+METRICS_FLUSH_INTERVAL = 5
+
+# Opt-in profiling: PROFILING_SAMPLE_RATE of requests run under cProfile
+# and the sampled stacks of requests slower than PROFILING_SLOW_MS are
+# kept. The newest PROFILING_KEEP captures stay in PROFILING_DIR.
+PROFILING_ENABLED = bool(os.getenv('PROFILING_ENABLED'))
+PROFILING_SAMPLE_RATE = float(os.getenv('PROFILING_SAMPLE_RATE', 0.01))
+PROFILING_SLOW_MS = int(os.getenv('PROFILING_SLOW_MS', 1000))
+PROFILING_INTERVAL = 0.005
+PROFILING_DIR = os.getenv('PROFILING_DIR', '/tmp/yatube-profiles')
+PROFILING_KEEP = int(os.getenv('PROFILING_KEEP', 500))
+
+# Write throttling as "<requests>/<s|m|h|d>" per user, or per IP address
+# for anonymous visitors, read from RATELIMIT_IP_HEADER (X-Real-IP, set by
+# nginx, in docker-compose, where gunicorn's port is not published) or
+# REMOTE_ADDR when the header is missing. Staff are exempt.
+RATELIMIT_ENABLED = os.getenv('RATELIMIT_ENABLED', '1') != '0'
+RATELIMITS = {
+    'post': '20/m',
+    'comment': '30/m',
+    'follow': '60/m',
+    'signup': '10/h',
+}
+RATELIMIT_IP_HEADER = os.getenv('RATELIMIT_IP_HEADER', 'REMOTE_ADDR')
+
+# With WARMUP on (gunicorn.conf.py sets it) each gunicorn worker compiles
+# templates and URLs and renders the index and the WARMUP_PAGES busiest
+# group and profile pages before it accepts connections.
+WARMUP = bool(os.getenv('WARMUP'))
+WARMUP_PAGES = 5
+
+# Over-budget views are logged, or raise QueryBudgetExceeded when strict.
+QUERY_BUDGET_STRICT = False
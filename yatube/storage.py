@@ -0,0 +1,23 @@
+"""Static files storage: hashed names plus gzip and Brotli copies.
+
+``collectstatic`` writes every file under a content-hashed name, records
+the names in ``staticfiles.json`` and stores ``.gz`` and ``.br`` versions
+next to them, so neither WhiteNoise nor nginx compresses anything per
+request and hashed files can be cached forever.
+
+Templates referring to a file that is not in the manifest (tests, a
+checkout where ``collectstatic`` has not run, assets shipped outside the
+repository) get its plain URL instead of a server error.
+"""
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+
+class StaticFilesStorage(CompressedManifestStaticFilesStorage):
+    manifest_strict = False
+
+    def hashed_name(self, name, content=None, filename=None):
+        try:
+            return super().hashed_name(name, content, filename)
+        except ValueError:
+            # The file does not exist, keep the name as it is.
+            return name